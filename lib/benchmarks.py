@@ -0,0 +1,189 @@
+import argparse
+import json
+import platform
+import sys
+import timeit
+from functools import partial
+from itertools import count
+import birational_equivalence as be
+import field
+import point as pt
+from montgomery import Montgomery
+from utils import GF
+
+PRIMES = {
+    "p255": 2**255 - 19,
+    "p384": 2**384 - 2**128 - 2**96 + 2**32 - 1,
+    "p521": 2**521 - 1,
+}
+ENUMERATION_PRIME = 10007
+CONVERSIONS = {
+    "shortw": be.BirationalEquivalence.to_weierstrass,
+    "twiedw": be.BirationalEquivalence.to_twisted_edwards,
+    "edward": be.BirationalEquivalence.to_edwards,
+    "twihes": be.BirationalEquivalence.to_twisted_hessian,
+}
+FORMAT_VERSION = 1
+
+
+def measure(function, repeat: int = 3):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def curve_family(p: int):
+    F = GF(p)
+    for a in count(3):
+        montgo = Montgomery(F(a), F(1))
+        try:
+            equivalences = {
+                form: conversion(montgo) for form, conversion in CONVERSIONS.items()
+            }
+        except Exception:
+            continue
+        base = next(P for x in count(2) for P in _lift(montgo, F(x)) if P.y != 0)
+        points = {"montgo": base}
+        for form, equivalence in equivalences.items():
+            points[form] = equivalence(base)
+        return points
+
+
+def _lift(curve, x):
+    try:
+        return [curve.lift_x(x)]
+    except pt.NoPoint:
+        return []
+
+
+def with_coordinates(point, coordinates: str):
+    curve = point.curve.with_coordinates(coordinates)
+    return curve.from_raw(curve.raw_affine(point.x, point.y))
+
+
+def arithmetic_benchmarks(name: str, points: dict):
+    benchmarks = {}
+    for form, base in points.items():
+        for coordinates in base.curve.coordinate_systems:
+            P = with_coordinates(base, coordinates)
+            Q = 3 * P
+            scalar = (1 << (P.field.order().bit_length() - 1)) - 12345
+            prefix = f"{name}/{form}/{coordinates}"
+            benchmarks[f"{prefix}/add"] = lambda P=P, Q=Q: P + Q
+            benchmarks[f"{prefix}/double"] = lambda P=P: P.curve.from_raw(
+                P.curve.raw_double(P.raw())
+            )
+            benchmarks[f"{prefix}/multiply"] = lambda P=P, k=scalar: k * P
+            benchmarks[f"{prefix}/affine"] = Q.affine
+        if hasattr(base.curve, "lift_x"):
+            benchmarks[f"{name}/{form}/lift"] = partial(base.curve.lift_x, base.x)
+        elif hasattr(base.curve, "lift_y"):
+            benchmarks[f"{name}/{form}/lift"] = partial(base.curve.lift_y, base.y)
+    return benchmarks
+
+
+def map_benchmarks(name: str, points: dict, batch: int = 256):
+    benchmarks = {}
+    for source, P in points.items():
+        multiples = [P]
+        for _ in range(batch - 1):
+            multiples.append(multiples[-1] + P)
+        domain = [Q for Q in multiples if not Q.is_infinity()]
+        for target, Q in points.items():
+            if source == target:
+                continue
+            try:
+                equivalence = be.BirationalEquivalence(P.curve, Q.curve)
+                equivalence(P)
+            except Exception:
+                continue
+            prefix = f"{name}/map/{source}->{target}"
+            benchmarks[prefix] = partial(equivalence, P)
+            benchmarks[f"{prefix}/many"] = partial(map_many, equivalence, domain)
+    return benchmarks
+
+
+def map_many(equivalence, points: list):
+    list(equivalence.map_many(points))
+    return len(points)
+
+
+def enumeration_benchmarks():
+    benchmarks = {}
+    for form, P in curve_family(ENUMERATION_PRIME).items():
+        benchmarks[f"small/{form}/enumerate"] = partial(enumerate_points, P.curve)
+    return benchmarks
+
+
+def enumerate_points(curve):
+    return sum(1 for _ in curve.points(raw=True))
+
+
+def run(primes: list = None, repeat: int = 3, pattern: str = None):
+    benchmarks = {}
+    for name in primes or PRIMES:
+        points = curve_family(PRIMES[name])
+        benchmarks.update(arithmetic_benchmarks(name, points))
+        benchmarks.update(map_benchmarks(name, points))
+    if pattern is None or "small" in pattern or "enumerate" in pattern:
+        benchmarks.update(enumeration_benchmarks())
+    results = {}
+    for key, function in benchmarks.items():
+        if pattern is None or pattern in key:
+            results[key] = measure(function, repeat)
+            if key.endswith("/many"):
+                results[key] /= function()
+    return {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "gmpy2": field.gmpy2 is not None,
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 1.2):
+    if baseline.get("version") != FORMAT_VERSION:
+        raise ValueError("Baseline was written by a different benchmark format")
+    rows = []
+    for key, seconds in sorted(results["results"].items()):
+        reference = baseline["results"].get(key)
+        if reference:
+            rows.append((key, reference, seconds, seconds / reference))
+    regressions = [row for row in rows if row[3] > threshold]
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark curve_forms operations")
+    parser.add_argument("--primes", nargs="*", choices=sorted(PRIMES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-k", dest="pattern")
+    parser.add_argument("--validation", choices=pt.VALIDATION_POLICIES)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results in this path")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    if args.validation is not None:
+        pt.set_validation(args.validation)
+    results = run(args.primes, args.repeat, args.pattern)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.baseline is None:
+        for key, seconds in sorted(results["results"].items()):
+            print(f"{key:60} {seconds * 1e6:14.2f} us")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(results, baseline, args.threshold)
+    for key, reference, seconds, ratio in rows:
+        flag = " REGRESSION" if ratio > args.threshold else ""
+        print(
+            f"{key:60} {reference * 1e6:14.2f} {seconds * 1e6:14.2f} {ratio:6.2f}{flag}"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
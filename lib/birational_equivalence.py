@@ -1,65 +1,219 @@
-from utils import sqrt, shortw_alpha_s_finder
+import heapq
+from collections import OrderedDict
+from functools import partial
+from itertools import count, islice
+from utils import (
+    GF,
+    Quotient,
+    batch_inverse,
+    roots,
+    sqrt,
+    square_root,
+    shortw_alpha_s_finder,
+)
 from edwards import Edwards
 from weierstrass import Weierstrass
 from twisted_edwards import TwistedEdwards
 from montgomery import Montgomery
+from hessian import TwistedHessian
+import disk_cache
 import point as pt
 
 
 class BirationalEquivalence:
-    def __init__(self, domain: pt.Curve, codomain: pt.Curve):
+    def __init__(self, domain: pt.Curve, codomain: pt.Curve, hops: tuple = None):
         self.domain = domain
         self.codomain = codomain
         self.domain_form = domain._form
         self.codomain_form = codomain._form
         self.field = self.domain.field
 
-        module = __import__(__name__)
-        self._mapping_function = getattr(
-            module, f"{self.domain_form}_to_{self.codomain_form}_point"
-        )
+        if hops is None:
+            self.path = (self.domain_form, self.codomain_form)
+            self._mapping_function = point_map(
+                self.domain_form, self.codomain_form, domain.params, codomain.params
+            )
+        else:
+            self.path = (self.domain_form,) + tuple(hop[1] for hop in hops)
+            self._mapping_function = partial(
+                composed_point,
+                hops=tuple((point_map(*hop), hop[2], hop[3]) for hop in hops),
+            )
+
+    @classmethod
+    def compose(cls, domain: pt.Curve, codomain_form: str):
+        key = (domain, codomain_form)
+        equivalence = composed_equivalences.get(key)
+        if equivalence is None:
+            hops = cheapest_path(domain, codomain_form)
+            params = hops[-1][3] if hops else domain.params
+            codomain = FORMS[codomain_form](*params)
+            equivalence = cls(domain, codomain, hops)
+            composed_equivalences[key] = equivalence
+            while len(composed_equivalences) > COMPOSED_LIMIT:
+                composed_equivalences.popitem(last=False)
+        else:
+            composed_equivalences.move_to_end(key)
+        return equivalence
 
     @classmethod
     def to_edwards(cls, domain: pt.Curve):
         source_form = domain._form
         assert source_form != "edward"
-        module = __import__(__name__)
-        bir_eq = getattr(module, f"{source_form}_to_edward")
-        edward = Edwards(*bir_eq(domain.params))
+        edward = Edwards(*curve_map(source_form, "edward", domain.params))
         return cls(domain, edward)
 
     @classmethod
     def to_weierstrass(cls, domain: pt.Curve):
         source_form = domain._form
         assert source_form != "shortw"
-        module = __import__(__name__)
-        bir_eq = getattr(module, f"{source_form}_to_shortw")
-        shortw = Weierstrass(*bir_eq(domain.params))
+        shortw = Weierstrass(*curve_map(source_form, "shortw", domain.params))
         return cls(domain, shortw)
 
     @classmethod
     def to_twisted_edwards(cls, domain: pt.Curve):
         source_form = domain._form
         assert source_form != "twiedw"
-        module = __import__(__name__)
-        bir_eq = getattr(module, f"{source_form}_to_twiedw")
-        twiedw = TwistedEdwards(*bir_eq(domain.params))
+        twiedw = TwistedEdwards(*curve_map(source_form, "twiedw", domain.params))
         return cls(domain, twiedw)
 
     @classmethod
     def to_montgomery(cls, domain: pt.Curve):
         source_form = domain._form
         assert source_form != "montgo"
-        module = __import__(__name__)
-        bir_eq = getattr(module, f"{source_form}_to_montgo")
-        montgo = Montgomery(*bir_eq(domain.params))
+        montgo = Montgomery(*curve_map(source_form, "montgo", domain.params))
         return cls(domain, montgo)
 
+    @classmethod
+    def to_twisted_hessian(cls, domain: pt.Curve):
+        source_form = domain._form
+        assert source_form != "twihes"
+        twihes = TwistedHessian(*curve_map(source_form, "twihes", domain.params))
+        return cls(domain, twihes)
+
     def __call__(self, point: pt.Point):
         point = point.affine()
         x, y = point.x, point.y
         x, y = self._mapping_function(self.domain.params, (x, y), self.codomain.params)
-        return pt.Point(self.codomain, x, y, self.field(1))
+        return pt.Point.trusted(self.codomain, x, y, self.field(1))
+
+    def raw_map(self, x, y):
+        return self._mapping_function(
+            self.domain.params, (Quotient(x), Quotient(y)), self.codomain.params
+        )
+
+    def map_many(self, points, check=False, raw=False, chunk_size=1024):
+        points = iter(points)
+        while True:
+            chunk = list(islice(points, chunk_size))
+            if not chunk:
+                return
+            yield from self._map_chunk(chunk, check, raw)
+
+    def _map_chunk(self, chunk, check, raw):
+        coordinates = [self._domain_coordinates(point) for point in chunk]
+        pending = [i for i, (_, _, z) in enumerate(coordinates) if z != 1 and z != 0]
+        z_inverses = batch_inverse([coordinates[i][2] for i in pending])
+        for i, z_inverse in zip(pending, z_inverses):
+            x, y, _ = coordinates[i]
+            coordinates[i] = (*self.domain.affine_coordinates(x, y, z_inverse), 1)
+
+        images = []
+        for x, y, z in coordinates:
+            image = None
+            if z != 0:
+                u, v = self.raw_map(x, y)
+                if u.den != 0 and v.den != 0:
+                    image = (u, v)
+            images.append(image)
+
+        denominators = [
+            q.den for image in images if image for q in image if q.den != 1
+        ]
+        inverses = iter(batch_inverse(denominators))
+        for point, image in zip(chunk, images):
+            if image is None:
+                mapped = self(self._domain_point(point))
+                yield (mapped.x, mapped.y) if raw else mapped
+                continue
+            u, v = (q.num if q.den == 1 else q.num * next(inverses) for q in image)
+            if raw:
+                yield u, v
+            else:
+                yield pt.Point(self.codomain, u, v, self.field(1), check=check)
+
+    def _domain_coordinates(self, point):
+        if isinstance(point, pt.Point):
+            return point.x, point.y, point.z
+        x, y, *z = point
+        return x, y, z[0] if z else 1
+
+    def _domain_point(self, point):
+        if isinstance(point, pt.Point):
+            return point
+        return pt.Point(self.domain, *point)
+
+
+def curve_map(domain_form: str, codomain_form: str, params: tuple):
+    return disk_cache.derived(
+        "curve_map",
+        tuple(params),
+        partial(CURVE_MAPS[domain_form, codomain_form], params),
+        (domain_form, codomain_form),
+    )
+
+
+def point_map(domain_form: str, codomain_form: str, domain: tuple, codomain: tuple):
+    mapping_function = POINT_MAPS[domain_form, codomain_form]
+    constants = POINT_MAP_CONSTANTS.get((domain_form, codomain_form))
+    if constants is not None:
+        constants = disk_cache.derived(
+            "point_map_constants",
+            (*domain, *codomain),
+            partial(constants, domain, codomain),
+            (domain_form, codomain_form),
+        )
+        mapping_function = partial(mapping_function, constants=constants)
+    return mapping_function
+
+
+def composed_point(domain: tuple, point: tuple, codomain: tuple, hops: tuple = ()):
+    x, y = point
+    fused = isinstance(x, Quotient)
+    if not fused:
+        x, y = Quotient(x), Quotient(y)
+    for mapping_function, source, target in hops:
+        x, y = mapping_function(source, (x, y), target)
+    if fused:
+        return x, y
+    inverses = iter(batch_inverse([q.den for q in (x, y) if q.den != 1]))
+    return tuple(q.num if q.den == 1 else q.num * next(inverses) for q in (x, y))
+
+
+def cheapest_path(domain: pt.Curve, codomain_form: str):
+    tiebreak = count()
+    queue = [(0, next(tiebreak), domain._form, domain.params, ())]
+    settled = set()
+    while queue:
+        cost, _, form, params, hops = heapq.heappop(queue)
+        if form in settled:
+            continue
+        settled.add(form)
+        if form == codomain_form:
+            return hops
+        for (source, target), weight in POINT_MAP_COSTS.items():
+            if source != form or target in settled:
+                continue
+            try:
+                target_params = curve_map(source, target, params)
+            except Exception:
+                continue
+            hop = (source, target, params, target_params)
+            heapq.heappush(
+                queue,
+                (cost + weight, next(tiebreak), target, target_params, hops + (hop,)),
+            )
+    raise ValueError(f"No birational map from {domain._form} to {codomain_form}")
 
 
 def shortw_to_montgo(shortw: tuple):
@@ -68,10 +222,18 @@ def shortw_to_montgo(shortw: tuple):
     return montgo_a, montgo_b
 
 
-def shortw_to_montgo_point(shortw: tuple, point: tuple, montgo: tuple):
-    x, y = point
+def shortw_to_montgo_constants(shortw: tuple, montgo: tuple):
     a, b = montgo
-    alpha, s = a / (3 * b), b
+    return a / (3 * b), b
+
+
+def shortw_to_montgo_point(
+    shortw: tuple, point: tuple, montgo: tuple, constants: tuple = None
+):
+    x, y = point
+    if constants is None:
+        constants = shortw_to_montgo_constants(shortw, montgo)
+    alpha, s = constants
     return s * (x - alpha), s * y
 
 
@@ -83,10 +245,20 @@ def montgo_to_shortw(montgo: tuple):
     return shortw_a, shortw_b
 
 
-def montgo_to_shortw_point(montgo: tuple, point: tuple, shortw: tuple):
-    x, y = point
+def montgo_to_shortw_constants(montgo: tuple, shortw: tuple):
     a, b = montgo
-    return (3 * x + a) / (3 * b), y / b
+    b_inverse = 1 / b
+    return a, b_inverse / 3, b_inverse
+
+
+def montgo_to_shortw_point(
+    montgo: tuple, point: tuple, shortw: tuple, constants: tuple = None
+):
+    x, y = point
+    if constants is None:
+        constants = montgo_to_shortw_constants(montgo, shortw)
+    a, b3_inverse, b_inverse = constants
+    return (3 * x + a) * b3_inverse, y * b_inverse
 
 
 def shortw_to_twiedw(shortw: tuple):
@@ -96,10 +268,18 @@ def shortw_to_twiedw(shortw: tuple):
     return twiedw_a, twiedw_d
 
 
-def shortw_to_twiedw_point(shortw: tuple, point: tuple, twiedw: tuple):
-    x, y = point
+def shortw_to_twiedw_constants(shortw: tuple, twiedw: tuple):
     a, d = twiedw
-    alpha, s = (a + d) / 6, 4 / (a - d)
+    return (a + d) / 6, 4 / (a - d)
+
+
+def shortw_to_twiedw_point(
+    shortw: tuple, point: tuple, twiedw: tuple, constants: tuple = None
+):
+    x, y = point
+    if constants is None:
+        constants = shortw_to_twiedw_constants(shortw, twiedw)
+    alpha, s = constants
     return (x - alpha) / y, (s * (x - alpha) - 1) / (s * (x - alpha) + 1)
 
 
@@ -159,10 +339,18 @@ def edward_to_twiedw(edward: tuple):
     return twiedw_a, twiedw_d
 
 
-def edward_to_twiedw_point(edward: tuple, point: tuple, twiedw: tuple):
+def edward_to_twiedw_constants(edward: tuple, twiedw: tuple):
     c, d = edward
+    return 1 / c
+
+
+def edward_to_twiedw_point(
+    edward: tuple, point: tuple, twiedw: tuple, constants: GF = None
+):
     x, y = point
-    return x, y / c
+    if constants is None:
+        constants = edward_to_twiedw_constants(edward, twiedw)
+    return x, y * constants
 
 
 def edward_to_shortw(edward: tuple):
@@ -191,14 +379,24 @@ def shortw_to_edward(shortw: tuple):
         a, b = shortw
         edward_c, edward_d = t, -4 * a - 3 * alpha**2
         return edward_c, edward_d
+    raise Exception("The curve does not support this form.")
 
 
-def shortw_to_edward_point(shortw: tuple, point: tuple, edward: tuple):
-    x, y = point
+def shortw_to_edward_constants(shortw: tuple, edward: tuple):
     a, b = shortw
     c, d = edward
     s = 1 / sqrt(-3 * a - d)
     alpha = (1 / c**2 - 2 / s) / 3
+    return alpha, s, c
+
+
+def shortw_to_edward_point(
+    shortw: tuple, point: tuple, edward: tuple, constants: tuple = None
+):
+    x, y = point
+    if constants is None:
+        constants = shortw_to_edward_constants(shortw, edward)
+    alpha, s, c = constants
     u, v = (x - alpha) / y, (s * (x - alpha) - 1) / (s * (x - alpha) + 1) * c
     return u, v
 
@@ -209,10 +407,18 @@ def montgo_to_edward(montgo: tuple):
     return edward_c, edward_d
 
 
-def montgo_to_edward_point(montgo: tuple, point: tuple, edward: tuple):
+def montgo_to_edward_constants(montgo: tuple, edward: tuple):
     a, b = montgo
+    return sqrt(b / (a + 2))
+
+
+def montgo_to_edward_point(
+    montgo: tuple, point: tuple, edward: tuple, constants: GF = None
+):
     x, y = point
-    return x / y, (x - 1) / (x + 1) * sqrt(b / (a + 2))
+    if constants is None:
+        constants = montgo_to_edward_constants(montgo, edward)
+    return x / y, (x - 1) / (x + 1) * constants
 
 
 def edward_to_montgo(edward: tuple):
@@ -227,3 +433,152 @@ def edward_to_montgo_point(edward: tuple, point: tuple, montgo: tuple):
     c, d = edward
     x, y = point
     return (c + y) / (c - y), (c + y) / ((c - y) * x)
+
+
+
+def twihes_to_shortw(twihes: tuple):
+    a, d = twihes
+    shortw_a = -(d**4 + 216 * a * d) / 3888
+    shortw_b = (d**6 - 540 * a * d**3 - 5832 * a**2) / 629856
+    return shortw_a, shortw_b
+
+
+def twihes_to_shortw_constants(twihes: tuple, shortw: tuple):
+    a, d = twihes
+    return d, d**3 / 27 - a, d**2 / 36
+
+
+def twihes_to_shortw_point(
+    twihes: tuple, point: tuple, shortw: tuple, constants: tuple = None
+):
+    x, y = point
+    if constants is None:
+        constants = twihes_to_shortw_constants(twihes, shortw)
+    d, k, shift = constants
+    w = k / (d * x + 3 * y + 3)
+    u = x * w
+    return u - shift, w + (d * u - k) / 6
+
+
+def shortw_to_twihes(shortw: tuple):
+    a, b = shortw
+    for x in roots(a.parent(), [-(a**2), 12 * b, 6 * a, 0, 3]):
+        root = square_root(-x)
+        if root is None or root == 0:
+            continue
+        twihes_d = 6 * root
+        k = (432 * a + twihes_d**4) / (24 * twihes_d)
+        twihes_a = twihes_d**3 / 27 - k
+        return twihes_a, twihes_d
+    raise Exception("The curve does not support this form.")
+
+
+def shortw_to_twihes_constants(shortw: tuple, twihes: tuple):
+    a, d = twihes
+    return d, d**3 / 27 - a, d**2 / 36
+
+
+def shortw_to_twihes_point(
+    shortw: tuple, point: tuple, twihes: tuple, constants: tuple = None
+):
+    x, y = point
+    if constants is None:
+        constants = shortw_to_twihes_constants(shortw, twihes)
+    d, k, shift = constants
+    u = x + shift
+    w = y - (d * u - k) / 6
+    return u / w, (k - d * u) / (3 * w) - 1
+
+
+def montgo_to_twihes(montgo: tuple):
+    return shortw_to_twihes(montgo_to_shortw(montgo))
+
+
+def montgo_to_twihes_constants(montgo: tuple, twihes: tuple):
+    shortw = montgo_to_shortw(montgo)
+    return (
+        shortw,
+        montgo_to_shortw_constants(montgo, shortw),
+        shortw_to_twihes_constants(shortw, twihes),
+    )
+
+
+def montgo_to_twihes_point(
+    montgo: tuple, point: tuple, twihes: tuple, constants: tuple = None
+):
+    if constants is None:
+        constants = montgo_to_twihes_constants(montgo, twihes)
+    shortw, to_shortw, to_twihes = constants
+    point = montgo_to_shortw_point(montgo, point, shortw, to_shortw)
+    return shortw_to_twihes_point(shortw, point, twihes, to_twihes)
+
+
+def twihes_to_montgo(twihes: tuple):
+    return shortw_to_montgo(twihes_to_shortw(twihes))
+
+
+def twihes_to_montgo_constants(twihes: tuple, montgo: tuple):
+    shortw = twihes_to_shortw(twihes)
+    return (
+        shortw,
+        twihes_to_shortw_constants(twihes, shortw),
+        shortw_to_montgo_constants(shortw, montgo),
+    )
+
+
+def twihes_to_montgo_point(
+    twihes: tuple, point: tuple, montgo: tuple, constants: tuple = None
+):
+    if constants is None:
+        constants = twihes_to_montgo_constants(twihes, montgo)
+    shortw, to_shortw, to_montgo = constants
+    point = twihes_to_shortw_point(twihes, point, shortw, to_shortw)
+    return shortw_to_montgo_point(shortw, point, montgo, to_montgo)
+
+
+FORMS = {
+    "shortw": Weierstrass,
+    "montgo": Montgomery,
+    "twiedw": TwistedEdwards,
+    "edward": Edwards,
+    "twihes": TwistedHessian,
+}
+
+CURVE_MAPS = {
+    (source, target): globals()[f"{source}_to_{target}"]
+    for source in FORMS
+    for target in FORMS
+    if f"{source}_to_{target}" in globals()
+}
+
+POINT_MAPS = {
+    pair: globals()[f"{pair[0]}_to_{pair[1]}_point"] for pair in CURVE_MAPS
+}
+
+POINT_MAP_CONSTANTS = {
+    pair: globals()[f"{pair[0]}_to_{pair[1]}_constants"]
+    for pair in CURVE_MAPS
+    if f"{pair[0]}_to_{pair[1]}_constants" in globals()
+}
+
+POINT_MAP_COSTS = {
+    ("shortw", "montgo"): 6,
+    ("shortw", "twiedw"): 16,
+    ("shortw", "edward"): 18,
+    ("montgo", "shortw"): 5,
+    ("montgo", "twiedw"): 6,
+    ("montgo", "edward"): 8,
+    ("twiedw", "shortw"): 33,
+    ("twiedw", "montgo"): 9,
+    ("twiedw", "edward"): 1,
+    ("edward", "shortw"): 38,
+    ("edward", "montgo"): 13,
+    ("edward", "twiedw"): 1,
+    ("twihes", "shortw"): 24,
+    ("twihes", "montgo"): 33,
+    ("shortw", "twihes"): 21,
+    ("montgo", "twihes"): 26,
+}
+
+COMPOSED_LIMIT = 256
+composed_equivalences = OrderedDict()
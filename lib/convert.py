@@ -0,0 +1,215 @@
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from itertools import chain
+import birational_equivalence as be
+import encoding
+import point as pt
+from parallel import BatchService
+from utils import GF
+
+FORMATS = ("jsonl", "csv", "binary")
+
+
+def build_curve(form: str, prime: int, params: list):
+    F = GF(prime)
+    return be.FORMS[form](*(F(param) for param in params))
+
+
+def _point(curve, x, y, check: bool):
+    F = curve.field
+    raw = curve.raw_affine(F(int(x)), F(int(y)))
+    return pt.Point(curve, *raw, check=check)
+
+
+def read_jsonl(stream, curve, check: bool = True):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if record is None:
+            yield curve.infinity()
+        elif isinstance(record, dict):
+            yield _point(curve, record["x"], record["y"], check)
+        else:
+            yield _point(curve, *record, check)
+
+
+def read_csv(stream, curve, check: bool = True):
+    for row in csv.reader(stream):
+        if not row or row[0].strip() == "x":
+            continue
+        if not row[0].strip():
+            yield curve.infinity()
+        else:
+            yield _point(curve, row[0], row[1], check)
+
+
+def read_binary(stream, curve, compressed: bool = True):
+    size = encoding.point_length(curve, compressed)
+    while True:
+        data = stream.read(size)
+        if not data:
+            return
+        if len(data) != size:
+            raise ValueError("Truncated binary point stream")
+        yield encoding.decode(curve, data, compressed)
+
+
+def write_jsonl(stream, points):
+    for point in points:
+        if point.is_infinity():
+            stream.write("null\n")
+        else:
+            stream.write(json.dumps({"x": int(point.x), "y": int(point.y)}) + "\n")
+
+
+def write_csv(stream, points):
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(("x", "y"))
+    for point in points:
+        if point.is_infinity():
+            writer.writerow(("", ""))
+        else:
+            writer.writerow((int(point.x), int(point.y)))
+
+
+def write_binary(stream, points, compressed: bool = True, chunk_size: int = 1024):
+    chunk = []
+    for point in points:
+        chunk.append(point)
+        if len(chunk) == chunk_size:
+            stream.write(encoding.encode_many(chunk, compressed))
+            chunk = []
+    stream.write(encoding.encode_many(chunk, compressed))
+
+
+def convert_points(equivalence, points, service=None, chunk_size: int = 1024):
+    infinities = deque()
+
+    def finite():
+        for point in points:
+            infinity = point.is_infinity()
+            infinities.append(infinity)
+            if not infinity:
+                yield point
+
+    if service is None:
+        images = equivalence.map_many(finite(), chunk_size=chunk_size)
+    else:
+        images = service.convert(equivalence, finite())
+    identity = equivalence.codomain.infinity()
+    for image in images:
+        while infinities.popleft():
+            yield identity
+        yield image
+    while infinities:
+        infinities.popleft()
+        yield identity
+
+
+def _inputs(paths: list, binary: bool):
+    if not paths:
+        yield sys.stdin.buffer if binary else sys.stdin
+        return
+    for path in paths:
+        with _open(path, "r", binary) as f:
+            yield f
+
+
+def _open(path, mode: str, binary: bool):
+    if binary:
+        return open(path, mode + "b")
+    return open(path, mode, newline="")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert a stream of points to another curve form"
+    )
+    parser.add_argument("--form", required=True, choices=sorted(be.FORMS))
+    parser.add_argument("--prime", required=True, type=int)
+    parser.add_argument("--params", required=True, type=int, nargs="+")
+    parser.add_argument("--to", required=True, choices=sorted(be.FORMS))
+    parser.add_argument("--input-format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--output-format", choices=FORMATS)
+    parser.add_argument("--uncompressed", action="store_true")
+    parser.add_argument("--trust-input", action="store_true")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("-o", "--output", help="write points to this path")
+    parser.add_argument(
+        "--describe", action="store_true", help="print the target curve to stderr"
+    )
+    parser.add_argument("inputs", nargs="*", help="input files (default: stdin)")
+    args = parser.parse_args(argv)
+    output_format = args.output_format or args.input_format
+    if not args.uncompressed:
+        for option, form, kind in (
+            ("--form", args.form, args.input_format),
+            ("--to", args.to, output_format),
+        ):
+            if kind == "binary" and not encoding.has_compression(be.FORMS[form]):
+                parser.error(
+                    f"{option} {form} has no compressed binary encoding; "
+                    "pass --uncompressed"
+                )
+
+    domain = build_curve(args.form, args.prime, args.params)
+    equivalence = be.BirationalEquivalence.compose(domain, args.to)
+    codomain = equivalence.codomain
+    compressed = not args.uncompressed
+    if args.describe:
+        description = {
+            "form": codomain._form,
+            "prime": args.prime,
+            "params": [int(param) for param in codomain.params],
+        }
+        print(json.dumps(description), file=sys.stderr)
+
+    if args.input_format == "binary":
+        files = _inputs(args.inputs, True)
+        readers = (read_binary(f, domain, compressed) for f in files)
+    else:
+        read = read_csv if args.input_format == "csv" else read_jsonl
+        files = _inputs(args.inputs, False)
+        readers = (read(f, domain, not args.trust_input) for f in files)
+    points = chain.from_iterable(readers)
+
+    binary_output = output_format == "binary"
+    if args.output:
+        output = _open(args.output, "w", binary_output)
+    elif binary_output:
+        output = sys.stdout.buffer
+    else:
+        output = sys.stdout
+
+    service = None
+    if args.processes is not None and args.processes > 1:
+        service = BatchService(
+            equivalences=[equivalence],
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+        )
+    try:
+        images = convert_points(equivalence, points, service, args.chunk_size)
+        if binary_output:
+            write_binary(output, images, compressed, args.chunk_size)
+        elif output_format == "csv":
+            write_csv(output, images)
+        else:
+            write_jsonl(output, images)
+        output.flush()
+    finally:
+        if service is not None:
+            service.close()
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import os
+import sys
+from collections import Counter, defaultdict
+
+OPERATIONS = ("M", "S", "I", "sqrt", "is_square", "add", "small")
+TRANSPARENT_FRAMES = {
+    "__add__",
+    "__radd__",
+    "__sub__",
+    "__rsub__",
+    "__mul__",
+    "__rmul__",
+    "__truediv__",
+    "__rtruediv__",
+    "__pow__",
+    "__neg__",
+    "inverse",
+    "sqrt",
+    "square_root",
+    "is_square",
+}
+
+_counters = []
+
+
+def record(operation: str, amount: int = 1):
+    if not _counters:
+        return
+    site = _call_site()
+    for counter in _counters:
+        counter.add(operation, site, amount)
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None and (
+        frame.f_code.co_filename == __file__
+        or frame.f_code.co_name in TRANSPARENT_FRAMES
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return "<unknown>"
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}.{frame.f_code.co_name}"
+
+
+class OperationCounter:
+    def __init__(self):
+        self.totals = Counter()
+        self.sites = defaultdict(Counter)
+
+    def __enter__(self):
+        _counters.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _counters.remove(self)
+
+    def add(self, operation: str, site: str, amount: int = 1):
+        self.totals[operation] += amount
+        self.sites[site][operation] += amount
+
+    def reset(self):
+        self.totals.clear()
+        self.sites.clear()
+
+    def as_dict(self):
+        return {
+            "totals": dict(self.totals),
+            "sites": {site: dict(counts) for site, counts in self.sites.items()},
+        }
+
+    def report(self):
+        rows = [("site",) + OPERATIONS]
+        for site, counts in sorted(self.sites.items()):
+            rows.append((site,) + tuple(str(counts[op]) for op in OPERATIONS))
+        rows.append(("total",) + tuple(str(self.totals[op]) for op in OPERATIONS))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+            for row in rows
+        )
+
+
+class CountingField:
+    def __init__(self, field):
+        self.base = field
+
+    def __call__(self, value):
+        if isinstance(value, CountedElement):
+            value = value.value
+        return CountedElement(self, self.base(value))
+
+    def order(self):
+        return self.base.order()
+
+    def characteristic(self):
+        return self.base.characteristic()
+
+    def zero(self):
+        return self(0)
+
+    def one(self):
+        return self(1)
+
+    def random_element(self):
+        return CountedElement(self, self.base.random_element())
+
+    def __iter__(self):
+        for value in self.base:
+            yield CountedElement(self, value)
+
+    def __len__(self):
+        return int(self.order())
+
+    def __eq__(self, other):
+        return isinstance(other, CountingField) and self.base == other.base
+
+    def __hash__(self):
+        return hash((CountingField, self.base))
+
+    def __repr__(self):
+        return f"Counting {self.base}"
+
+
+class CountedElement:
+    __slots__ = ("field", "value")
+
+    def __init__(self, field: CountingField, value):
+        self.field = field
+        self.value = value
+
+    def parent(self):
+        return self.field
+
+    def _wrap(self, value):
+        return CountedElement(self.field, value)
+
+    def __add__(self, other):
+        record("add")
+        return self._wrap(self.value + _unwrap(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        record("add")
+        return self._wrap(self.value - _unwrap(other))
+
+    def __rsub__(self, other):
+        record("add")
+        return self._wrap(_unwrap(other) - self.value)
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            record("small")
+        elif other is self:
+            record("S")
+        else:
+            record("M")
+        return self._wrap(self.value * _unwrap(other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, int):
+            record("small")
+        else:
+            record("I")
+            record("M")
+        return self._wrap(self.value / _unwrap(other))
+
+    def __rtruediv__(self, other):
+        record("I")
+        if other != 1:
+            record("small" if isinstance(other, int) else "M")
+        return self._wrap(_unwrap(other) / self.value)
+
+    def __pow__(self, exponent: int):
+        exponent = int(exponent)
+        if exponent < 0:
+            record("I")
+        magnitude = abs(exponent)
+        if magnitude > 1:
+            record("S", magnitude.bit_length() - 1)
+            record("M", bin(magnitude).count("1") - 1)
+        return self._wrap(self.value**exponent)
+
+    def __neg__(self):
+        record("add")
+        return self._wrap(-self.value)
+
+    def __pos__(self):
+        return self
+
+    def inverse(self):
+        record("I")
+        return self._wrap(1 / self.value)
+
+    def is_square(self):
+        record("is_square")
+        return self.value.is_square()
+
+    def sqrt(self):
+        record("sqrt")
+        return self._wrap(self.value.sqrt())
+
+    def __eq__(self, other):
+        return self.value == _unwrap(other)
+
+    def __ne__(self, other):
+        return self.value != _unwrap(other)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __int__(self):
+        return int(self.value)
+
+    def __index__(self):
+        return int(self.value)
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def _unwrap(value):
+    if isinstance(value, CountedElement):
+        return value.value
+    return value
+
+
+def instrument(curve):
+    field = CountingField(curve.field)
+    arguments = {
+        name: field(value) if hasattr(value, "parent") else value
+        for name, value in curve._arguments.items()
+    }
+    counted = type(curve)(**arguments)
+    counted.validation = curve.validation
+    return counted
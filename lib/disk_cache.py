@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+from point import NoPoint
+
+FORMAT_VERSION = 1
+DERIVATION_VERSION = 1
+DEFAULT_MAX_BYTES = 64 << 20
+ENVIRONMENT = "CURVE_FORMS_CACHE"
+ERRORS = {error.__name__: error for error in (Exception, ValueError, NoPoint)}
+
+
+class DiskCache:
+    def __init__(self, path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.join(path, f"v{FORMAT_VERSION}")
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: list):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + ".json")
+
+    def get(self, key: list, default=None):
+        key = json.loads(json.dumps(key))
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                record = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            record = None
+        if (
+            record is None
+            or record.get("version") != DERIVATION_VERSION
+            or record.get("key") != key
+        ):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return record["value"]
+
+    def put(self, key: list, value):
+        key = json.loads(json.dumps(key))
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {"version": DERIVATION_VERSION, "key": key, "value": value}
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(path), suffix=".tmp", delete=False
+        ) as f:
+            json.dump(record, f)
+        os.replace(f.name, path)
+        self.evict()
+
+    def entries(self):
+        result = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, path))
+        return result
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+active = None
+
+
+def enable(path=None, max_bytes: int = DEFAULT_MAX_BYTES):
+    global active
+    if path is None:
+        path = os.environ.get(ENVIRONMENT) or os.path.join(
+            os.path.expanduser("~"), ".cache", "curve_forms"
+        )
+    active = DiskCache(path, max_bytes)
+    return active
+
+
+def disable():
+    global active
+    active = None
+
+
+def _dump(value):
+    if value is None:
+        return None
+    if isinstance(value, (tuple, list)):
+        return [_dump(item) for item in value]
+    return int(value)
+
+
+def _restore(value, field):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return tuple(_restore(item, field) for item in value)
+    return field(value)
+
+
+def derived(kind: str, params: tuple, compute, extra: tuple = ()):
+    if active is None:
+        return compute()
+    field = params[0].parent()
+    key = [
+        kind,
+        *extra,
+        type(field).__name__,
+        int(field.order()),
+        [int(param) for param in params],
+    ]
+    record = active.get(key)
+    if isinstance(record, dict):
+        if record.get("error") in ERRORS and isinstance(record.get("args"), list):
+            raise ERRORS[record["error"]](*record["args"])
+        if "value" in record:
+            try:
+                return _restore(record["value"], field)
+            except (TypeError, ValueError):
+                pass
+    try:
+        value = compute()
+    except Exception as error:
+        name = type(error).__name__
+        if name in ERRORS and all(isinstance(arg, str) for arg in error.args):
+            active.put(key, {"error": name, "args": list(error.args)})
+        raise
+    active.put(key, {"value": _dump(value)})
+    return value
+
+
+if os.environ.get(ENVIRONMENT):
+    enable()
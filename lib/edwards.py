@@ -1,58 +1,85 @@
-from utils import GF, PolynomialRing
+from utils import GF, square_root
 from point import NoPoint, Point, Curve
 
 
 class Edwards(Curve):
-    def __init__(self, c: GF, d: GF):
+    coordinate_systems = ("affine", "extended")
+
+    def __init__(self, c: GF, d: GF, coordinates="affine"):
         self.c = c
         self.d = d
         self.field = c.parent()
         self._form = "edward"
         self.params = (c, d)
+        self._set_coordinates(coordinates)
+
+    def raw_add(self, point1, point2):
+        if self.coordinates == "extended":
+            return edward_extended_sum(self.params, point1, point2)
+        spoint = edward_sum(self.params, point1[:2], point2[:2])
+        return spoint[0], spoint[1], 1
+
+    def raw_double(self, point):
+        if self.coordinates == "extended":
+            return edward_extended_dbl(self.params, point)
+        spoint = edward_dbl(self.params, point[:2])
+        return spoint[0], spoint[1], 1
+
+    def raw_negate(self, point):
+        if len(point) == 4:
+            x, y, z, t = point
+            return -x, y, z, -t
+        x, y, z = point
+        return -x, y, z
 
-    def addition(self, point1, point2):
-        spoint = edward_sum(
-            (self.c, self.d), (point1.x, point1.y), (point2.x, point2.y)
-        )
-        return Point(self, spoint[0], spoint[1])
+    def raw_affine(self, x, y):
+        if self.coordinates == "extended":
+            return x, y, 1, x * y
+        return x, y, 1
 
     def is_infinity(self, x, y, z):
-        return x == 0 and y == self.c
+        return x == 0 and y == self.c * z
 
-    def infinity(self):
-        return Point(self, self.field(0), self.field(self.c))
+    def raw_infinity(self):
+        return self.raw_affine(self.field(0), self.field(self.c))
 
     def form(self):
         return "Edwards"
 
-    def negative(self, point):
-        return Point(self, -point.x, point.y, point.z)
-
     def __repr__(self):
         return f"Edwards curve x^2+y^2={self.c}^2(1+{self.d}x^2y^2) over F_{self.field.order()}"
 
     def check_point(self, x, y, z=1):
-        return x**2 + y**2 == self.c**2 * (1 + self.d * x**2 * y**2)
+        z2 = z**2
+        return (x**2 + y**2) * z2 == self.c**2 * (z2**2 + self.d * x**2 * y**2)
+
+    def has_complete_addition(self):
+        return not self.d.is_square()
 
-    def lift_y(self, y):
-        x = PolynomialRing(self.field, "x").gen()
-        roots = (x**2 + y**2 - self.c**2 * (1 + self.d * x**2 * y**2)).roots()
-        if roots == []:
+    def lift_y(self, y, parity=None):
+        c2, y2 = self.c**2, y**2
+        denominator = 1 - c2 * self.d * y2
+        if denominator == 0:
+            raise NoPoint("No such point")
+        x = square_root((c2 - y2) / denominator, parity)
+        if x is None:
             raise NoPoint("No such point")
-        return Point(self, roots[0][0], y)
-
-    def __iter__(self):
-        try:
-            for y in self.field:
-                try:
-                    point = self.lift_y(y)
-                    yield point
-                    if not point.x == 0:
-                        yield -point
-                except NoPoint:
-                    continue
-        except GeneratorExit:
-            pass
+        return Point.trusted(self, x, y)
+
+    def enumerate_range(self, start, stop, root):
+        p = int(self.field.order())
+        c2, d = int(self.c) ** 2, int(self.d)
+        for y in range(start, stop):
+            numerator, denominator = (c2 - y * y) % p, (1 - c2 * d * y * y) % p
+            if denominator == 0:
+                continue
+            r = root(numerator * denominator % p)
+            if r is not None:
+                x = r * pow(denominator, -1, p) % p
+                x = min(x, p - x)
+                yield x, y
+                if x:
+                    yield p - x, y
 
 
 def edward_sum(edward: tuple, point1: tuple, point2: tuple):
@@ -66,3 +93,26 @@ def edward_sum(edward: tuple, point1: tuple, point2: tuple):
 
 def edward_dbl(edward: tuple, point: tuple):
     return edward_sum(edward, point, point)
+
+
+def edward_extended_sum(edward: tuple, point1: tuple, point2: tuple):
+    c, d = edward
+    x1, y1, z1, t1 = point1
+    x2, y2, z2, t2 = point2
+    a = x1 * x2
+    b = y1 * y2
+    cc = d * t1 * t2
+    dd = z1 * z2
+    e = (x1 + y1) * (x2 + y2) - a - b
+    f = dd - cc
+    g = dd + cc
+    h = b - a
+    x3 = c * e * f
+    y3 = c * g * h
+    t3 = e * h
+    z3 = c**2 * f * g
+    return x3, y3, z3, t3
+
+
+def edward_extended_dbl(edward: tuple, point: tuple):
+    return edward_extended_sum(edward, point, point)
@@ -0,0 +1,194 @@
+import json
+import mmap
+import struct
+from itertools import islice
+import point as pt
+from utils import batch_affine
+
+MAGIC = b"CFPT"
+VERSION = 1
+HEADER = struct.Struct("<4sBQI")
+BATCH = 4096
+
+
+def coordinate_length(field):
+    return (int(field.order()).bit_length() + 8) // 8
+
+
+def point_length(curve, compressed: bool = True):
+    length = coordinate_length(curve.field)
+    return length if compressed else 2 * length
+
+
+def has_compression(curve):
+    return hasattr(curve, "lift_x") or hasattr(curve, "lift_y")
+
+
+def _compression(curve):
+    if hasattr(curve, "lift_x"):
+        return "x"
+    if hasattr(curve, "lift_y"):
+        return "y"
+    raise ValueError(f"{curve.form()} curves have no compressed encoding")
+
+
+def encode(point, compressed: bool = True):
+    curve = point.curve
+    if point.z != 1 and point.z != 0:
+        point = point.affine()
+    return _encode(curve, point.x, point.y, point.z, compressed)
+
+
+def _encode(curve, x, y, z, compressed):
+    length = coordinate_length(curve.field)
+    if z == 0:
+        if curve.raw_infinity()[2] != 0:
+            raise ValueError("Point has no affine encoding")
+        return b"\xff" * point_length(curve, compressed)
+    if not compressed:
+        return int(x).to_bytes(length, "little") + int(y).to_bytes(length, "little")
+    if _compression(curve) == "y":
+        x, y = y, x
+    value = int(x) | (int(y) & 1) << (8 * length - 1)
+    return value.to_bytes(length, "little")
+
+
+def decode(curve, data, compressed: bool = True):
+    if len(data) != point_length(curve, compressed):
+        raise ValueError("Encoded point has the wrong length")
+    if data == b"\xff" * len(data):
+        infinity = curve.raw_infinity()
+        if infinity[2] != 0:
+            raise ValueError("Invalid point encoding")
+        return curve.from_raw(infinity)
+    field, p = curve.field, int(curve.field.order())
+    length = coordinate_length(field)
+    if not compressed:
+        x = int.from_bytes(data[:length], "little")
+        y = int.from_bytes(data[length:], "little")
+        if x >= p or y >= p:
+            raise ValueError("Invalid point encoding")
+        return pt.Point(curve, field(x), field(y))
+    value = int.from_bytes(data, "little")
+    sign = value >> (8 * length - 1)
+    coordinate = value & ((1 << (8 * length - 1)) - 1)
+    if coordinate >= p:
+        raise ValueError("Invalid point encoding")
+    if _compression(curve) == "x":
+        point = curve.lift_x(field(coordinate), sign)
+        other = point.y
+    else:
+        point = curve.lift_y(field(coordinate), sign)
+        other = point.x
+    if int(other) & 1 != sign:
+        raise pt.NoPoint("No such point")
+    return point
+
+
+def encode_many(points, compressed: bool = True):
+    points = batch_affine(list(points))
+    return b"".join(
+        _encode(point.curve, point.x, point.y, point.z, compressed)
+        for point in points
+    )
+
+
+def decode_many(curve, data, compressed: bool = True):
+    return list(iter_decode(curve, data, compressed))
+
+
+def iter_decode(curve, data, compressed: bool = True):
+    size = point_length(curve, compressed)
+    if len(data) % size:
+        raise ValueError("Buffer does not hold a whole number of points")
+    view = memoryview(data)
+    for offset in range(0, len(view), size):
+        yield decode(curve, view[offset : offset + size], compressed)
+
+
+def _header(curve, compressed: bool):
+    return json.dumps(
+        {
+            "form": curve._form,
+            "order": int(curve.field.order()),
+            "params": [int(param) for param in curve.params],
+            "compressed": compressed,
+        }
+    ).encode()
+
+
+def write_store(path, curve, points, compressed: bool = True):
+    header = _header(curve, compressed)
+    points = iter(points)
+    count = 0
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(header)) + header)
+        for batch in iter(lambda: list(islice(points, BATCH)), []):
+            f.write(encode_many(batch, compressed))
+            count += len(batch)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, count, len(header)))
+    return count
+
+
+class PointStore:
+    def __init__(self, path, curve):
+        self.curve = curve
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a point store")
+        magic, version, self.count, header_length = HEADER.unpack_from(self._map)
+        header = json.loads(self._map[HEADER.size : HEADER.size + header_length])
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or header["form"] != curve._form
+            or header["order"] != int(curve.field.order())
+            or header["params"] != [int(param) for param in curve.params]
+        ):
+            self.close()
+            raise ValueError(f"Point store {path} was written for a different curve")
+        self.compressed = header["compressed"]
+        self.size = point_length(curve, self.compressed)
+        self.offset = HEADER.size + header_length
+        if len(self._map) != self.offset + self.count * self.size:
+            self.close()
+            raise ValueError(f"Point store {path} is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def encoded(self, index: int):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Point store index out of range")
+        start = self.offset + index * self.size
+        return self._map[start : start + self.size]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step == 1:
+                begin = self.offset + start * self.size
+                end = self.offset + max(start, stop) * self.size
+                return decode_many(self.curve, self._map[begin:end], self.compressed)
+            return [self[i] for i in range(start, stop, step)]
+        return decode(self.curve, self.encoded(index), self.compressed)
+
+    def __iter__(self):
+        for start in range(0, self.count, BATCH):
+            yield from self[start : start + BATCH]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,85 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from field import sqrt_mod
+
+TABLE_LIMIT = 1 << 22
+
+
+@lru_cache(maxsize=8)
+def residue_table(p: int):
+    table = [None] * p
+    for root in range((p + 1) // 2):
+        table[root * root % p] = root
+    return table
+
+
+def residue_root(p: int):
+    if p <= TABLE_LIMIT:
+        return residue_table(p).__getitem__
+
+    def root(value: int):
+        root = sqrt_mod(value, p)
+        if root is None:
+            return None
+        return min(root, p - root)
+
+    return root
+
+
+def chunks(p: int, chunk_size: int):
+    for start in range(0, p, chunk_size):
+        yield start, min(start + chunk_size, p)
+
+
+def enumerate_chunk(curve, bounds: tuple):
+    p = int(curve.field.order())
+    return list(curve.enumerate_range(*bounds, residue_root(p)))
+
+
+_worker_curve = None
+
+
+def _initialize_worker(curve):
+    global _worker_curve
+    _worker_curve = curve
+
+
+def _enumerate_worker_chunk(bounds: tuple):
+    return enumerate_chunk(_worker_curve, bounds)
+
+
+def points(curve, processes: int = None, chunk_size: int = 1 << 14, raw=False):
+    field = curve.field
+    for point in curve.raw_points_at_infinity():
+        yield point if raw else curve.from_raw(point)
+    for result in _chunk_results(curve, processes, chunk_size):
+        for x, y in result:
+            point = curve.raw_affine(field(x), field(y))
+            yield point if raw else curve.from_raw(point)
+
+
+def ordered(executor, function, chunks, window: int, *args):
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunk_results(curve, processes: int, chunk_size: int):
+    bounds = chunks(int(curve.field.order()), chunk_size)
+    if processes is None or processes == 1:
+        for chunk in bounds:
+            yield enumerate_chunk(curve, chunk)
+        return
+    executor = ProcessPoolExecutor(
+        processes, initializer=_initialize_worker, initargs=(curve,)
+    )
+    try:
+        window = 2 * processes
+        yield from ordered(executor, _enumerate_worker_chunk, bounds, window)
+    finally:
+        executor.shutdown(cancel_futures=True)
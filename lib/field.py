@@ -0,0 +1,346 @@
+import random
+from functools import lru_cache, partial
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+if gmpy2 is not None:
+
+    def _inverse(value: int, p: int):
+        return int(gmpy2.invert(value, p))
+
+    def _power(value: int, exponent: int, p: int):
+        return int(gmpy2.powmod(value, exponent, p))
+
+    def legendre(value: int, p: int):
+        return int(gmpy2.legendre(value, p))
+
+else:
+
+    def _inverse(value: int, p: int):
+        return pow(value, -1, p)
+
+    def _power(value: int, exponent: int, p: int):
+        return pow(value, exponent, p)
+
+    def legendre(value: int, p: int):
+        symbol = pow(value, (p - 1) // 2, p)
+        return -1 if symbol == p - 1 else symbol
+
+
+class PrimeField:
+    _instances = {}
+
+    def __new__(cls, p: int):
+        p = int(p)
+        field = cls._instances.get(p)
+        if field is None:
+            field = super().__new__(cls)
+            field.p = p
+            cls._instances[p] = field
+        return field
+
+    def __getnewargs__(self):
+        return (self.p,)
+
+    def __call__(self, value):
+        if isinstance(value, FieldElement):
+            if value.field is self:
+                return value
+            value = value.value
+        return FieldElement(self, int(value) % self.p)
+
+    def order(self):
+        return self.p
+
+    def characteristic(self):
+        return self.p
+
+    def zero(self):
+        return FieldElement(self, 0)
+
+    def one(self):
+        return FieldElement(self, 1)
+
+    def random_element(self):
+        return FieldElement(self, random.randrange(self.p))
+
+    def __iter__(self):
+        for value in range(self.p):
+            yield FieldElement(self, value)
+
+    def __contains__(self, element):
+        return isinstance(element, FieldElement) and element.field is self
+
+    def __len__(self):
+        return self.p
+
+    def __repr__(self):
+        return f"Finite Field of size {self.p}"
+
+
+class FieldElement:
+    __slots__ = ("field", "value")
+
+    def __init__(self, field: PrimeField, value: int):
+        self.field = field
+        self.value = value
+
+    def parent(self):
+        return self.field
+
+    def _coerce(self, other):
+        if isinstance(other, FieldElement):
+            if other.field is not self.field:
+                raise TypeError(f"Cannot combine {self.field} and {other.field}")
+            return other.value
+        if isinstance(other, int):
+            return other
+        return None
+
+    def __add__(self, other):
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return FieldElement(self.field, (self.value + value) % self.field.p)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return FieldElement(self.field, (self.value - value) % self.field.p)
+
+    def __rsub__(self, other):
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return FieldElement(self.field, (value - self.value) % self.field.p)
+
+    def __mul__(self, other):
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return FieldElement(self.field, (self.value * value) % self.field.p)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return self * FieldElement(self.field, value % self.field.p).inverse()
+
+    def __rtruediv__(self, other):
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return self.inverse() * value
+
+    def __pow__(self, exponent: int):
+        exponent = int(exponent)
+        if exponent < 0:
+            return self.inverse() ** -exponent
+        return FieldElement(self.field, _power(self.value, exponent, self.field.p))
+
+    def __neg__(self):
+        return FieldElement(self.field, -self.value % self.field.p)
+
+    def __pos__(self):
+        return self
+
+    def inverse(self):
+        if self.value == 0:
+            raise ZeroDivisionError("Inverse of 0 does not exist")
+        return FieldElement(self.field, _inverse(self.value, self.field.p))
+
+    def is_square(self):
+        if self.value == 0 or self.field.p == 2:
+            return True
+        return legendre(self.value, self.field.p) == 1
+
+    def sqrt(self):
+        root = sqrt_mod(self.value, self.field.p)
+        if root is None:
+            raise ValueError(f"{self} is not a square in {self.field}")
+        return FieldElement(self.field, root)
+
+    def __eq__(self, other):
+        if isinstance(other, FieldElement):
+            return self.field is other.field and self.value == other.value
+        if isinstance(other, int):
+            return self.value == other % self.field.p
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __bool__(self):
+        return self.value != 0
+
+    def __int__(self):
+        return self.value
+
+    def __index__(self):
+        return self.value
+
+    def __repr__(self):
+        return str(self.value)
+
+    def __reduce__(self):
+        return FieldElement, (self.field, self.value)
+
+
+def sqrt_mod(value: int, p: int):
+    value %= p
+    if value == 0 or p == 2:
+        return value
+    return square_root_engine(p)(value)
+
+
+@lru_cache(maxsize=64)
+def square_root_engine(p: int):
+    if p % 4 == 3:
+        return partial(_sqrt_3_mod_4, p=p, exponent=(p + 1) // 4)
+    if p % 8 == 5:
+        return partial(_sqrt_atkin, p=p, exponent=(p - 5) // 8)
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q, s = q // 2, s + 1
+    z = 2
+    while legendre(z, p) != -1:
+        z += 1
+    return partial(_sqrt_tonelli_shanks, p=p, q=q, s=s, c=_power(z, q, p))
+
+
+def _sqrt_3_mod_4(value: int, p: int, exponent: int):
+    root = _power(value, exponent, p)
+    return root if root * root % p == value else None
+
+
+def _sqrt_atkin(value: int, p: int, exponent: int):
+    double = 2 * value % p
+    b = _power(double, exponent, p)
+    i = double * b * b % p
+    root = value * b * (i - 1) % p
+    return root if root * root % p == value else None
+
+
+def _sqrt_tonelli_shanks(value: int, p: int, q: int, s: int, c: int):
+    if legendre(value, p) != 1:
+        return None
+    m = s
+    t, root = _power(value, q, p), _power(value, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2, i = t2 * t2 % p, i + 1
+        b = _power(c, 1 << (m - i - 1), p)
+        m, c = i, b * b % p
+        t, root = t * c % p, root * b % p
+    return root
+
+
+def polynomial_roots(coefficients: list, field: PrimeField):
+    p = field.p
+    polynomial = _trim([int(c) % p for c in coefficients])
+    if not any(polynomial):
+        raise ValueError("Roots of the zero polynomial are not defined")
+    polynomial = _monic(polynomial, p)
+    x_to_p = _polynomial_power([0, 1], p, polynomial, p)
+    split = _polynomial_gcd(_polynomial_sub(x_to_p, [0, 1], p), polynomial, p)
+    roots = sorted(_split_roots(split, p))
+    return [FieldElement(field, root) for root in roots]
+
+
+def _split_roots(polynomial: list, p: int):
+    degree = len(polynomial) - 1
+    if degree < 1:
+        return []
+    if degree == 1:
+        return [-polynomial[0] % p]
+    if p == 2:
+        return [x for x in range(2) if _evaluate(polynomial, x, p) == 0]
+    while True:
+        delta = random.randrange(p)
+        power = _polynomial_power([delta, 1], (p - 1) // 2, polynomial, p)
+        factor = _polynomial_gcd(_polynomial_sub(power, [1], p), polynomial, p)
+        if 0 < len(factor) - 1 < degree:
+            cofactor = _polynomial_divmod(polynomial, factor, p)[0]
+            return _split_roots(factor, p) + _split_roots(cofactor, p)
+
+
+def _trim(polynomial: list):
+    while len(polynomial) > 1 and polynomial[-1] == 0:
+        polynomial = polynomial[:-1]
+    return polynomial
+
+
+def _monic(polynomial: list, p: int):
+    polynomial = _trim(polynomial)
+    inverse = _inverse(polynomial[-1], p)
+    return [c * inverse % p for c in polynomial]
+
+
+def _evaluate(polynomial: list, x: int, p: int):
+    result = 0
+    for c in reversed(polynomial):
+        result = (result * x + c) % p
+    return result
+
+
+def _polynomial_sub(left: list, right: list, p: int):
+    length = max(len(left), len(right))
+    left = left + [0] * (length - len(left))
+    right = right + [0] * (length - len(right))
+    return _trim([(a - b) % p for a, b in zip(left, right)])
+
+
+def _polynomial_divmod(numerator: list, denominator: list, p: int):
+    remainder = list(numerator)
+    quotient = [0] * max(len(numerator) - len(denominator) + 1, 1)
+    inverse = _inverse(denominator[-1], p)
+    while len(remainder) >= len(denominator) and any(remainder):
+        shift = len(remainder) - len(denominator)
+        factor = remainder[-1] * inverse % p
+        quotient[shift] = factor
+        for i, c in enumerate(denominator):
+            remainder[shift + i] = (remainder[shift + i] - factor * c) % p
+        remainder = _trim(remainder)
+    return _trim(quotient), remainder
+
+
+def _polynomial_mulmod(left: list, right: list, modulus: list, p: int):
+    product = [0] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        for j, b in enumerate(right):
+            product[i + j] = (product[i + j] + a * b) % p
+    return _polynomial_divmod(product, modulus, p)[1]
+
+
+def _polynomial_power(base: list, exponent: int, modulus: list, p: int):
+    result = [1]
+    base = _polynomial_divmod(base, modulus, p)[1]
+    while exponent > 0:
+        if exponent & 1:
+            result = _polynomial_mulmod(result, base, modulus, p)
+        base = _polynomial_mulmod(base, base, modulus, p)
+        exponent >>= 1
+    return result
+
+
+def _polynomial_gcd(left: list, right: list, p: int):
+    left, right = _trim(left), _trim(right)
+    while any(right):
+        left, right = right, _polynomial_divmod(left, right, p)[1]
+    if not any(left):
+        return left
+    return _monic(left, p)
@@ -0,0 +1,116 @@
+from utils import GF, roots
+from point import Curve
+
+
+class TwistedHessian(Curve):
+    coordinate_systems = ("affine", "projective")
+
+    def __init__(self, a: GF, d: GF, coordinates="affine"):
+        self.a = a
+        self.d = d
+        self.field = a.parent()
+        self._form = "twihes"
+        self.params = (a, d)
+        self._set_coordinates(coordinates)
+
+    def raw_add(self, point1, point2):
+        point = twihes_projective_sum(self.params, point1[:3], point2[:3])
+        if self.coordinates == "projective":
+            return point
+        return self.raw_normal_form(point)
+
+    def raw_double(self, point):
+        point = twihes_projective_dbl(self.params, point[:3])
+        if self.coordinates == "projective":
+            return point
+        return self.raw_normal_form(point)
+
+    def raw_negate(self, point):
+        x, y, z = point
+        if self.coordinates == "projective":
+            return x, z, y
+        return self.raw_normal_form((x, z, y))
+
+    def is_infinity(self, x, y, z):
+        return x == 0 and y == -z
+
+    def raw_infinity(self):
+        return self.field(0), -self.field(1), self.field(1)
+
+    def raw_points_at_infinity(self):
+        one, zero = self.field(1), self.field(0)
+        return [(one, t, zero) for t in roots(self.field, [self.a, 0, 0, 1])]
+
+    def form(self):
+        return "Twisted Hessian"
+
+    def has_complete_addition(self):
+        return not roots(self.field, [-self.a, 0, 0, 1])
+
+    def check_point(self, x, y, z=1):
+        return self.a * x**3 + y**3 + z**3 == self.d * x * y * z
+
+    def __repr__(self):
+        return f"Twisted Hessian curve {self.a}x^3+y^3+1={self.d}xy over F_{self.field.order()}"
+
+    def enumerate_range(self, start, stop, root):
+        field = self.field
+        for x in range(start, stop):
+            x = field(x)
+            coefficients = [self.a * x**3 + 1, -self.d * x, field(0), field(1)]
+            for y in roots(field, coefficients):
+                yield int(x), int(y)
+
+
+class Hessian(TwistedHessian):
+    def __init__(self, D: GF, coordinates="affine"):
+        self.D = D
+        super().__init__(D.parent()(1), 3 * D, coordinates)
+
+    def form(self):
+        return "Hessian"
+
+    def __repr__(self):
+        return f"Hessian curve x^3+y^3+1=3*{self.D}xy over F_{self.field.order()}"
+
+
+def twihes_sum(twihes: tuple, point1: tuple, point2: tuple):
+    x1, y1 = point1
+    x2, y2 = point2
+    x3, y3, z3 = twihes_projective_sum(twihes, (x1, y1, 1), (x2, y2, 1))
+    return x3 / z3, y3 / z3
+
+
+def twihes_dbl(twihes: tuple, point: tuple):
+    x1, y1 = point
+    x3, y3, z3 = twihes_projective_dbl(twihes, (x1, y1, 1))
+    return x3 / z3, y3 / z3
+
+
+def twihes_projective_sum(twihes: tuple, point1: tuple, point2: tuple):
+    a, d = twihes
+    x1, y1, z1 = point1
+    x2, y2, z2 = point2
+    aa = x1 * z2
+    bb = z1 * z2
+    cc = y1 * x2
+    dd = y1 * y2
+    ee = z1 * y2
+    ff = a * x1 * x2
+    x3 = aa * bb - cc * dd
+    y3 = dd * ee - ff * aa
+    z3 = ff * cc - bb * ee
+    if x3 == 0 and y3 == 0 and z3 == 0:
+        x3 = x1**2 * y2 * z2 - x2**2 * y1 * z1
+        y3 = z1**2 * x2 * y2 - z2**2 * x1 * y1
+        z3 = y1**2 * x2 * z2 - y2**2 * x1 * z1
+    return x3, y3, z3
+
+
+def twihes_projective_dbl(twihes: tuple, point: tuple):
+    a, d = twihes
+    x1, y1, z1 = point
+    xx = a * x1**3
+    yy = y1**3
+    zz = z1**3
+    return x1 * (zz - yy), z1 * (yy - xx), y1 * (xx - zz)
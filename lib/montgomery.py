@@ -1,52 +1,91 @@
-from utils import GF, PolynomialRing
+from utils import GF, square_root
 import point as pt
 
 
 class Montgomery(pt.Curve):
-    def __init__(self, a: GF, b: GF):
+    coordinate_systems = ("affine", "projective")
+
+    def __init__(self, a: GF, b: GF, coordinates="affine"):
         self.a = a
         self.b = b
         self.field = a.parent()
         self._form = "montgo"
         self.params = (a, b)
+        self._set_coordinates(coordinates)
 
-    def addition(self, point1, point2):
-        if point1.is_infinity():
+    def raw_add(self, point1, point2):
+        if self.is_infinity(*point1):
             return point2
-        if point2.is_infinity():
+        if self.is_infinity(*point2):
             return point1
+        if self.coordinates == "projective":
+            return montgo_projective_sum(self.params, point1, point2)
         try:
             if point1 == point2:
-                spoint = montgo_dbl((self.a, self.b), (point1.x, point1.y))
+                spoint = montgo_dbl((self.a, self.b), point1[:2])
             else:
-                spoint = montgo_sum(
-                    (self.a, self.b), (point1.x, point1.y), (point2.x, point2.y)
-                )
+                spoint = montgo_sum((self.a, self.b), point1[:2], point2[:2])
         except ZeroDivisionError:
-            return self.infinity()
-        return pt.Point(self, spoint[0], spoint[1])
+            return self.raw_infinity()
+        return spoint[0], spoint[1], 1
+
+    def raw_double(self, point):
+        if self.is_infinity(*point):
+            return point
+        if self.coordinates == "projective":
+            return montgo_projective_dbl(self.params, point)
+        try:
+            spoint = montgo_dbl((self.a, self.b), point[:2])
+        except ZeroDivisionError:
+            return self.raw_infinity()
+        return spoint[0], spoint[1], 1
+
+    def raw_negate(self, point):
+        x, y, z = point
+        return x, -y, z
 
     def is_infinity(self, x, y, z):
         return z == 0
 
-    def infinity(self):
-        return pt.Point(self, self.field(0), self.field(1), self.field(0))
+    def raw_infinity(self):
+        return self.field(0), self.field(1), self.field(0)
 
     def form(self):
         return "Montgomery"
 
-    def negative(self, point):
-        return pt.Point(self, point.x, -point.y, point.z)
-
     def check_point(self, x, y, z=1):
         return self.b * y**2 * z == x**3 + self.a * x**2 * z + x * z**2
     
-    def lift_x(self, x):
-        y = PolynomialRing(self.field, "y").gen()
-        roots = (y**2 - (x**3+self.a*x**2+x)/self.b).roots()
-        if roots == []:
+    def enumerate_range(self, start, stop, root):
+        p = int(self.field.order())
+        a, b = int(self.a), int(self.b)
+        b_inverse = int(1 / self.b)
+        for x in range(start, stop):
+            r = root((x * x * x + a * x * x + x) * b % p)
+            if r is not None:
+                y = min(r * b_inverse % p, -r * b_inverse % p)
+                yield x, y
+                if y:
+                    yield x, p - y
+
+    def lift_x(self, x, parity=None):
+        y = square_root((x**3 + self.a * x**2 + x) / self.b, parity)
+        if y is None:
             raise pt.NoPoint("No such point")
-        return pt.Point(self, x,roots[0][0])
+        return pt.Point.trusted(self, x, y)
+
+    def ladder(self, x, scalar, lift=False):
+        scalar = abs(scalar)
+        if x == 0:
+            if scalar % 2 == 0:
+                return self.infinity() if lift else None
+            return self.lift_x(x) if lift else x
+        bits = max(scalar.bit_length(), self.field.order().bit_length())
+        (xk, zk), _ = montgo_ladder(self.params, x, scalar, bits)
+        if zk == 0:
+            return self.infinity() if lift else None
+        xk = xk / zk
+        return self.lift_x(xk) if lift else xk
 
 
 def montgo_sum(montgo: tuple, point1: tuple, point2: tuple):
@@ -72,3 +111,64 @@ def montgo_dbl(montgo: tuple, point: tuple):
         - y1
     )
     return x3, y3
+
+
+def montgo_ladder(montgo: tuple, x: GF, scalar: int, bits: int = None):
+    a, b = montgo
+    a24 = (a + 2) / 4
+    if bits is None:
+        bits = scalar.bit_length()
+    field = x.parent()
+    x2, z2 = field(1), field(0)
+    x3, z3 = x, field(1)
+    swap = 0
+    for i in reversed(range(bits)):
+        bit = (scalar >> i) & 1
+        swap ^= bit
+        if swap:
+            x2, z2, x3, z3 = x3, z3, x2, z2
+        swap = bit
+        aa = (x2 + z2) ** 2
+        bb = (x2 - z2) ** 2
+        e = aa - bb
+        da = (x3 - z3) * (x2 + z2)
+        cb = (x3 + z3) * (x2 - z2)
+        x3 = (da + cb) ** 2
+        z3 = x * (da - cb) ** 2
+        x2 = aa * bb
+        z2 = e * (bb + a24 * e)
+    if swap:
+        x2, z2, x3, z3 = x3, z3, x2, z2
+    return (x2, z2), (x3, z3)
+
+
+def montgo_projective_sum(montgo: tuple, point1: tuple, point2: tuple):
+    a, b = montgo
+    x1, y1, z1 = point1
+    x2, y2, z2 = point2
+    u = y2 * z1 - y1 * z2
+    v = x2 * z1 - x1 * z2
+    if u == 0 and v == 0:
+        return montgo_projective_dbl(montgo, point1)
+    w = z1 * z2
+    x1z2 = x1 * z2
+    uu = u**2
+    vv = v**2
+    vvv = v * vv
+    x3 = v * (b * uu * w - vv * (a * w + x1z2 + x2 * z1))
+    y3 = u * vv * (2 * x1z2 + x2 * z1 + a * w) - b * u * uu * w - y1 * z2 * vvv
+    z3 = vvv * w
+    return x3, y3, z3
+
+
+def montgo_projective_dbl(montgo: tuple, point: tuple):
+    a, b = montgo
+    x1, y1, z1 = point
+    n = 3 * x1**2 + 2 * a * x1 * z1 + z1**2
+    d = 2 * b * y1 * z1
+    nn = n**2
+    dd = d**2
+    x3 = d * (b * nn * z1 - dd * (a * z1 + 2 * x1))
+    y3 = (3 * x1 + a * z1) * n * dd - b * n * nn * z1 - y1 * d * dd
+    z3 = d * dd * z1
+    return x3, y3, z3
@@ -0,0 +1,139 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from enumeration import ordered
+import point as pt
+from scalar_multiplication import (
+    FixedBaseTable,
+    fixed_base_tables,
+    register_base,
+    unregister_base,
+)
+
+_worker_state = None
+
+
+def _initialize_worker(curves: list, equivalences: list, tables: list):
+    global _worker_state
+    _worker_state = (curves, equivalences)
+    for table in tables:
+        fixed_base_tables[FixedBaseTable.key(table.base)] = table
+
+
+def _integers(point: tuple):
+    return tuple(int(coordinate) for coordinate in point)
+
+
+def _multiply_chunk(chunk: list, state: tuple = None):
+    curves, _ = state or _worker_state
+    results = []
+    for index, scalar, raw in chunk:
+        curve = curves[index]
+        point = curve.from_raw(tuple(map(curve.field, raw)))
+        results.append(_integers((scalar * point).raw()))
+    return results
+
+
+def _convert_chunk(chunk: list, index: int, state: tuple = None):
+    _, equivalences = state or _worker_state
+    equivalence = equivalences[index]
+    field = equivalence.domain.field
+    points = [tuple(map(field, raw)) for raw in chunk]
+    return [_integers(image) for image in equivalence.map_many(points, raw=True)]
+
+
+class BatchService:
+    def __init__(
+        self,
+        curves=(),
+        equivalences=(),
+        bases=(),
+        processes: int = None,
+        chunk_size: int = 256,
+        width: int = 4,
+    ):
+        self.equivalences = list(equivalences)
+        self.tables = [register_base(base, width) for base in bases]
+        curves = [
+            *curves,
+            *(equivalence.domain for equivalence in self.equivalences),
+            *(table.base.curve for table in self.tables),
+        ]
+        self.curves = list(dict.fromkeys(curves))
+        self._indices = {curve: i for i, curve in enumerate(self.curves)}
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self._executor = None
+        if processes is not None and processes != 1:
+            self._executor = ProcessPoolExecutor(
+                processes,
+                initializer=_initialize_worker,
+                initargs=(self.curves, self.equivalences, self.tables),
+            )
+
+    def _curve_index(self, curve):
+        index = self._indices.get(curve)
+        if index is None:
+            raise ValueError(f"{curve} was not registered with the service")
+        return index
+
+    def _run(self, function, tasks, *args):
+        chunks = iter(lambda: list(islice(tasks, self.chunk_size)), [])
+        if self._executor is None:
+            state = (self.curves, self.equivalences)
+            for chunk in chunks:
+                yield function(chunk, *args, state)
+            return
+        window = 2 * self.processes
+        yield from ordered(self._executor, function, chunks, window, *args)
+
+    def multiply(self, jobs, raw=False):
+        jobs = iter(jobs)
+        curves = deque()
+
+        def tasks():
+            for scalar, point in jobs:
+                index = self._curve_index(point.curve)
+                curves.append(point.curve)
+                yield index, int(scalar), _integers(point.raw())
+
+        results = self._run(_multiply_chunk, tasks())
+        for result in results:
+            for coordinates in result:
+                curve = curves.popleft()
+                point = tuple(map(curve.field, coordinates))
+                yield point if raw else curve.from_raw(point)
+
+    def convert(self, equivalence, points, raw=False):
+        index = next(
+            (i for i, known in enumerate(self.equivalences) if known is equivalence),
+            None,
+        )
+        if index is None:
+            raise ValueError("The equivalence was not registered with the service")
+        codomain, field = equivalence.codomain, equivalence.codomain.field
+        tasks = (
+            _integers(point.raw() if isinstance(point, pt.Point) else point)
+            for point in points
+        )
+        for result in self._run(_convert_chunk, tasks, index):
+            for u, v in result:
+                if raw:
+                    yield field(u), field(v)
+                else:
+                    yield pt.Point.trusted(codomain, field(u), field(v), field(1))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        for table in self.tables:
+            if fixed_base_tables.get(FixedBaseTable.key(table.base)) is table:
+                unregister_base(table.base)
+        self.tables = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,84 +1,221 @@
+import inspect
+import random
+import weakref
 from utils import GF
+from scalar_multiplication import multiply, table_cache
+import enumeration
 from abc import ABC, abstractmethod
 
+VALIDATION_POLICIES = ("always", "input", "sample")
+validation_policy = "always"
+validation_sample_rate = 0.01
+
+
+def set_validation(policy, sample_rate=None):
+    global validation_policy, validation_sample_rate
+    if policy not in VALIDATION_POLICIES:
+        raise ValueError(f"Unknown validation policy {policy}")
+    validation_policy = policy
+    if sample_rate is not None:
+        validation_sample_rate = sample_rate
+
 
 class Curve:
 
     params = None
     field = None
+    coordinates = "affine"
+    coordinate_systems = ("affine",)
+    validation = None
+    _instances = weakref.WeakValueDictionary()
+    _signatures = {}
+
+    def __new__(cls, *args, **kwargs):
+        arguments = cls._bind(args, kwargs)
+        values = tuple(arguments.values())
+        key = (cls, values[0].parent(), values)
+        curve = Curve._instances.get(key)
+        if curve is None:
+            curve = super().__new__(cls)
+            curve._arguments = arguments
+            Curve._instances[key] = curve
+        return curve
+
+    @classmethod
+    def _bind(cls, args, kwargs):
+        signature = Curve._signatures.get(cls)
+        if signature is None:
+            signature = Curve._signatures[cls] = inspect.signature(cls.__init__)
+        bound = signature.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments[next(iter(arguments))]
+        return arguments
+
+    def __reduce__(self):
+        return _construct, (type(self), self._arguments), self.__dict__
+
+    def with_coordinates(self, coordinates):
+        return type(self)(**{**self._arguments, "coordinates": coordinates})
+
+    def _set_coordinates(self, coordinates):
+        if coordinates not in self.coordinate_systems:
+            raise ValueError(
+                f"{self.form()} does not support {coordinates} coordinates"
+            )
+        self.coordinates = coordinates
+
+    def affine_coordinates(self, x, y, z_inverse):
+        return x * z_inverse, y * z_inverse
+
+    def set_validation(self, policy):
+        if policy is not None and policy not in VALIDATION_POLICIES:
+            raise ValueError(f"Unknown validation policy {policy}")
+        self.validation = policy
+
+    def validates_results(self):
+        policy = self.validation or validation_policy
+        if policy == "always":
+            return True
+        if policy == "sample":
+            return random.random() < validation_sample_rate
+        return False
 
-    @abstractmethod
     def addition(self, point1, point2):
+        return Point.trusted(self, *self.raw_add(point1.raw(), point2.raw()))
+
+    def infinity(self):
+        return Point.trusted(self, *self.raw_infinity())
+
+    def negative(self, point):
+        return Point.trusted(self, *self.raw_negate(point.raw()))
+
+    def point(self, x, y):
+        return Point(self, x, y)
+
+    def from_raw(self, point: tuple):
+        return Point.trusted(self, *point)
+
+    def raw_affine(self, x, y):
+        return x, y, 1
+
+    def raw_equal(self, point1: tuple, point2: tuple):
+        x1, y1, z1 = point1[:3]
+        x2, y2, z2 = point2[:3]
+        return x1 * z2 == x2 * z1 and y1 * z2 == y2 * z1 and x1 * y2 == x2 * y1
+
+    def raw_normal_form(self, point: tuple):
+        x, y, z = point[:3]
+        if z == 1:
+            return x, y, 1
+        if z != 0:
+            return (*self.affine_coordinates(x, y, self.field(1) / z), 1)
+        if y != 0:
+            return x / y, 1, 0
+        return 1, 0, 0
+
+    @abstractmethod
+    def raw_add(self, point1: tuple, point2: tuple):
         pass
 
     @abstractmethod
-    def is_infinity(self, x, y, z):
+    def raw_double(self, point: tuple):
         pass
 
     @abstractmethod
-    def infinity(self):
+    def raw_negate(self, point: tuple):
         pass
 
     @abstractmethod
-    def form(self):
+    def raw_infinity(self):
         pass
 
-    def point(self, x, y):
-        return Point(self, x, y)
+    @abstractmethod
+    def is_infinity(self, x, y, z):
+        pass
 
     @abstractmethod
-    def negative(self, x, y, z):
+    def form(self):
         pass
 
     @abstractmethod
     def check_point(self, x, y, z=1):
         pass
 
+    def has_complete_addition(self):
+        return False
+
+    def raw_points_at_infinity(self):
+        infinity = self.raw_infinity()
+        return [infinity] if infinity[2] == 0 else []
+
     @abstractmethod
-    def __iter__(self):
+    def enumerate_range(self, start: int, stop: int, root):
         pass
 
-    @abstractmethod
-    def __eq__(self, other):
-        return self.field == other.field and self.params == other.params
+    def points(self, processes: int = None, chunk_size: int = 1 << 14, raw=False):
+        return enumeration.points(self, processes, chunk_size, raw)
+
+    def __iter__(self):
+        return self.points()
 
 
 class Point:
-    def __init__(self, curve: Curve, x: GF, y: GF, z: GF = 1):
+    __slots__ = ("x", "y", "z", "t", "field", "curve", "_precomputed", "__weakref__")
+
+    def __init__(
+        self, curve: Curve, x: GF, y: GF, z: GF = 1, t: GF = None, check=True
+    ):
         self.x = x
         self.y = y
         self.z = z
         self.field = x.parent()
         self.curve = curve
+        if t is None and curve.coordinates == "extended":
+            t = x * y if z == 1 else x * y / z
+        self.t = t
+        self._precomputed = None
+        if not check:
+            return
         if not self.curve.check_point(x, y, z):
             raise NoPoint("Point is not on the curve")
+        if t is not None and t * z != x * y:
+            raise NoPoint("Point has inconsistent extended coordinate")
+
+    @classmethod
+    def trusted(cls, curve: Curve, x: GF, y: GF, z: GF = 1, t: GF = None):
+        return cls(curve, x, y, z, t, check=curve.validates_results())
 
     def is_infinity(self):
         return self.curve.is_infinity(self.x, self.y, self.z)
 
+    def raw(self):
+        if self.t is None:
+            return self.x, self.y, self.z
+        return self.x, self.y, self.z, self.t
+
     def __add__(self, other):
         return self.curve.addition(self, other)
 
     def __rmul__(self, scalar):
         if scalar < 0:
             return (-scalar) * (-self)
-        accumulator = self.curve.infinity()
-        temp = self
-        while scalar > 0:
-            if scalar % 2 == 1:
-                accumulator = accumulator + temp
-            temp = temp + temp
-            scalar >>= 1
-        return accumulator
+        return multiply(self, scalar)
+
+    def precompute(self, width=4):
+        table_cache.store(self, width)
+        return self
 
     def __eq__(self, other):
-        return (
-            self.curve == other.curve
-            and self.x == other.x
-            and self.y == other.y
-            and self.z == other.z
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.curve is other.curve and self.curve.raw_equal(
+            self.raw(), other.raw()
         )
 
+    def __hash__(self):
+        return hash(self.curve.raw_normal_form(self.raw()))
+
     def __repr__(self):
         return f"({self.x},{self.y},{self.z})"
 
@@ -90,7 +227,14 @@ class Point:
 
     def affine(self):
         assert self.z != 0
-        return Point(self.curve, self.x / self.z, self.y / self.z)
+        x, y = self.curve.affine_coordinates(
+            self.x, self.y, self.field(1) / self.z
+        )
+        return Point.trusted(self.curve, x, y)
+
+
+def _construct(cls, arguments):
+    return cls(**arguments)
 
 
 class NoPoint(Exception):
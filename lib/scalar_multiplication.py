@@ -0,0 +1,370 @@
+import json
+import os
+import weakref
+from collections import OrderedDict
+from utils import batch_normalize
+
+
+def wnaf(scalar: int, width: int):
+    digits = []
+    modulus = 1 << width
+    while scalar > 0:
+        if scalar & 1:
+            digit = scalar % modulus
+            if digit >= modulus >> 1:
+                digit -= modulus
+            scalar -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        scalar >>= 1
+    return digits
+
+
+def odd_multiples(curve, point: tuple, count: int):
+    multiples = [point]
+    double = curve.raw_double(point)
+    for _ in range(count - 1):
+        multiples.append(curve.raw_add(multiples[-1], double))
+    return multiples
+
+
+def binary_multiply(point, scalar: int):
+    curve = point.curve
+    return curve.from_raw(raw_binary_multiply(curve, point.raw(), scalar))
+
+
+def raw_binary_multiply(curve, point: tuple, scalar: int):
+    accumulator = curve.raw_infinity()
+    temp = point
+    while scalar > 0:
+        if scalar & 1:
+            accumulator = curve.raw_add(accumulator, temp)
+        scalar >>= 1
+        if scalar:
+            temp = curve.raw_double(temp)
+    return accumulator
+
+
+def wnaf_multiply(point, scalar: int, width: int, table: list = None):
+    curve = point.curve
+    return curve.from_raw(raw_wnaf_multiply(curve, point.raw(), scalar, width, table))
+
+
+def raw_wnaf_multiply(curve, point: tuple, scalar: int, width: int, table=None):
+    if table is None:
+        table = odd_multiples(curve, point, 1 << (width - 2))
+    accumulator = curve.raw_infinity()
+    for digit in reversed(wnaf(scalar, width)):
+        accumulator = curve.raw_double(accumulator)
+        if digit > 0:
+            accumulator = curve.raw_add(accumulator, table[digit >> 1])
+        elif digit < 0:
+            negative = curve.raw_negate(table[(-digit) >> 1])
+            accumulator = curve.raw_add(accumulator, negative)
+    return accumulator
+
+
+def sliding_window_multiply(point, scalar: int, width: int, table: list = None):
+    curve = point.curve
+    return curve.from_raw(
+        raw_sliding_window_multiply(curve, point.raw(), scalar, width, table)
+    )
+
+
+def raw_sliding_window_multiply(
+    curve, point: tuple, scalar: int, width: int, table=None
+):
+    if table is None:
+        table = odd_multiples(curve, point, 1 << (width - 1))
+    accumulator = curve.raw_infinity()
+    i = scalar.bit_length() - 1
+    while i >= 0:
+        if not (scalar >> i) & 1:
+            accumulator = curve.raw_double(accumulator)
+            i -= 1
+            continue
+        j = max(i - width + 1, 0)
+        while not (scalar >> j) & 1:
+            j += 1
+        for _ in range(i - j + 1):
+            accumulator = curve.raw_double(accumulator)
+        window = (scalar >> j) & ((1 << (i - j + 1)) - 1)
+        accumulator = curve.raw_add(accumulator, table[window >> 1])
+        i = j - 1
+    return accumulator
+
+
+def default_width(bits: int):
+    if bits < 80:
+        return 3
+    if bits < 300:
+        return 4
+    return 5
+
+
+def multiply(point, scalar: int):
+    fixed_base = fixed_base_tables.get(FixedBaseTable.key(point))
+    if fixed_base is not None and scalar.bit_length() <= fixed_base.bits:
+        return fixed_base.multiply(scalar)
+    table = table_cache.lookup(point)
+    if table is not None:
+        return wnaf_multiply(point, scalar, table.width, table.multiples)
+    if scalar.bit_length() < 16:
+        return binary_multiply(point, scalar)
+    return wnaf_multiply(point, scalar, default_width(scalar.bit_length()))
+
+
+class PrecomputedTable:
+    def __init__(self, width: int, multiples: list):
+        self.width = width
+        self.multiples = multiples
+
+    def __len__(self):
+        return len(self.multiples)
+
+
+class PrecomputationCache:
+    def __init__(self, max_points: int = 1 << 16):
+        self.max_points = max_points
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def store(self, point, width: int):
+        if width < 2:
+            raise ValueError("Window width must be at least 2")
+        self.evict(point)
+        count = 1 << (width - 2)
+        self._make_room(count)
+        try:
+            multiples = odd_multiples(point.curve, point.raw(), count)
+            multiples = batch_normalize(point.curve, multiples)
+            table = PrecomputedTable(width, multiples)
+        except MemoryError:
+            self.clear()
+            return None
+        key = id(point)
+        reference = weakref.ref(point, lambda _: self._forget(key))
+        self._entries[key] = (reference, len(table))
+        self.size += len(table)
+        point._precomputed = table
+        return table
+
+    def lookup(self, point):
+        table = point._precomputed
+        if table is not None and id(point) in self._entries:
+            self._entries.move_to_end(id(point))
+        return table
+
+    def evict(self, point):
+        if point._precomputed is None:
+            return
+        point._precomputed = None
+        self._forget(id(point))
+
+    def clear(self):
+        while self._entries:
+            self._evict_oldest()
+
+    def _make_room(self, count: int):
+        while self._entries and self.size + count > self.max_points:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        key, (ref, size) = self._entries.popitem(last=False)
+        self.size -= size
+        point = ref()
+        if point is not None:
+            point._precomputed = None
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+table_cache = PrecomputationCache()
+
+
+class FixedBaseTable:
+    version = 1
+
+    def __init__(self, base, width: int, bits: int, rows: list):
+        self.base = base
+        self.width = width
+        self.bits = bits
+        self.rows = rows
+
+    @classmethod
+    def build(cls, base, width: int = 4, bits: int = None):
+        curve = base.curve
+        if bits is None:
+            bits = curve.field.order().bit_length() + 1
+        rows = []
+        multiple = base.raw()
+        for _ in range(-(-bits // width)):
+            row = [multiple]
+            for _ in range((1 << width) - 2):
+                row.append(curve.raw_add(row[-1], multiple))
+            rows.append(row)
+            multiple = curve.raw_add(row[-1], multiple)
+        points = batch_normalize(curve, [point for row in rows for point in row])
+        row_length = len(rows[0])
+        rows = [
+            points[i : i + row_length] for i in range(0, len(points), row_length)
+        ]
+        return cls(base, width, bits, rows)
+
+    @staticmethod
+    def key(point):
+        curve = point.curve
+        return (
+            curve.field.order(),
+            curve._form,
+            curve.coordinates,
+            curve.params,
+            point.x,
+            point.y,
+            point.z,
+        )
+
+    def multiply(self, scalar: int):
+        curve = self.base.curve
+        accumulator = curve.raw_infinity()
+        mask = (1 << self.width) - 1
+        for row in self.rows:
+            digit = scalar & mask
+            if digit:
+                accumulator = curve.raw_add(accumulator, row[digit - 1])
+            scalar >>= self.width
+        return curve.from_raw(accumulator)
+
+    def dump(self, path):
+        curve = self.base.curve
+        data = {
+            "version": self.version,
+            "form": curve._form,
+            "coordinates": curve.coordinates,
+            "order": int(curve.field.order()),
+            "params": [int(param) for param in curve.params],
+            "width": self.width,
+            "bits": self.bits,
+            "base": _integers(self.base.raw()),
+            "rows": [[_integers(point) for point in row] for row in self.rows],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path, base):
+        with open(path) as f:
+            data = json.load(f)
+        curve = base.curve
+        if (
+            data["version"] != cls.version
+            or data["form"] != curve._form
+            or data["coordinates"] != curve.coordinates
+            or data["order"] != int(curve.field.order())
+            or data["params"] != [int(param) for param in curve.params]
+            or data["base"] != _integers(base.raw())
+        ):
+            raise ValueError(f"Table in {path} was built for a different base")
+        rows = [
+            [tuple(map(curve.field, point)) for point in row] for row in data["rows"]
+        ]
+        for row in rows:
+            for point in row:
+                if not curve.check_point(*point[:3]):
+                    raise ValueError(f"Table in {path} contains invalid points")
+        return cls(base, data["width"], data["bits"], rows)
+
+
+def _integers(point: tuple):
+    return [int(coordinate) for coordinate in point]
+
+
+def register_base(point, width: int = 4, bits: int = None, path=None):
+    if bits is None:
+        bits = point.curve.field.order().bit_length() + 1
+    table = None
+    if path is not None and os.path.exists(path):
+        table = FixedBaseTable.load(path, point)
+        if table.width != width or table.bits != bits:
+            table = None
+    if table is None:
+        table = FixedBaseTable.build(point, width, bits)
+        if path is not None:
+            table.dump(path)
+    fixed_base_tables[FixedBaseTable.key(point)] = table
+    return table
+
+
+def unregister_base(point):
+    fixed_base_tables.pop(FixedBaseTable.key(point), None)
+
+
+fixed_base_tables = {}
+
+
+def multi_scalar_multiply(scalars: list, points: list):
+    if len(scalars) != len(points) or not points:
+        raise ValueError("Expected the same positive number of scalars and points")
+    curve = points[0].curve
+    scalars = list(scalars)
+    points = [point.raw() for point in points]
+    for i, scalar in enumerate(scalars):
+        if scalar < 0:
+            scalars[i], points[i] = -scalar, curve.raw_negate(points[i])
+    if len(points) <= 4:
+        return curve.from_raw(raw_shamir_multiply(curve, scalars, points))
+    return curve.from_raw(raw_pippenger_multiply(curve, scalars, points))
+
+
+def raw_shamir_multiply(curve, scalars: list, points: list):
+    table = [None]
+    for i, point in enumerate(points):
+        table.append(point)
+        for mask in range(1, 1 << i):
+            table.append(curve.raw_add(table[mask], point))
+    accumulator = curve.raw_infinity()
+    for bit in reversed(range(max(scalars).bit_length())):
+        accumulator = curve.raw_double(accumulator)
+        mask = 0
+        for i, scalar in enumerate(scalars):
+            mask |= ((scalar >> bit) & 1) << i
+        if mask:
+            accumulator = curve.raw_add(accumulator, table[mask])
+    return accumulator
+
+
+def pippenger_window(count: int):
+    return max(2, count.bit_length() - 2)
+
+
+def raw_pippenger_multiply(curve, scalars: list, points: list, window: int = None):
+    if window is None:
+        window = pippenger_window(len(points))
+    infinity = curve.raw_infinity()
+    mask = (1 << window) - 1
+    bits = max(scalars).bit_length()
+    accumulator = infinity
+    for shift in reversed(range(0, bits, window)):
+        for _ in range(window):
+            accumulator = curve.raw_double(accumulator)
+        buckets = [None] * mask
+        for scalar, point in zip(scalars, points):
+            digit = (scalar >> shift) & mask
+            if digit:
+                bucket = buckets[digit - 1]
+                if bucket is None:
+                    buckets[digit - 1] = point
+                else:
+                    buckets[digit - 1] = curve.raw_add(bucket, point)
+        running = infinity
+        window_sum = infinity
+        for bucket in reversed(buckets):
+            if bucket is not None:
+                running = curve.raw_add(running, bucket)
+            window_sum = curve.raw_add(window_sum, running)
+        accumulator = curve.raw_add(accumulator, window_sum)
+    return accumulator
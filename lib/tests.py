@@ -1,10 +1,28 @@
+import gc
+import json
+import os
+import subprocess
+import sys
+import weakref
+import pytest
+from concurrent.futures import Future
+from itertools import islice
 from sage.all import EllipticCurve, GF, PolynomialRing
 import weierstrass
 import edwards
 import twisted_edwards
 import montgomery
-from point import Point
+import hessian
+from point import NoPoint, Point
+import benchmarks
 import birational_equivalence as be
+import counting
+import encoding
+import enumeration
+import tracing
+import field
+import scalar_multiplication as sm
+import utils
 
 
 class TestTransformations:
@@ -272,3 +290,892 @@ def test_edwards():
     assert tE(P) + tE(Q) == tE(R)
     assert tW(P) + tW(Q) == tW(R)
     assert tT(P) + tT(Q) == tT(R)
+
+
+def test_coordinates():
+    F = GF(101)
+    curves = [
+        (
+            weierstrass.Weierstrass,
+            (F(1), F(2)),
+            "jacobian",
+            (F(77), F(30)),
+            (F(17), F(36)),
+        ),
+        (
+            montgomery.Montgomery,
+            (F(49), F(51)),
+            "projective",
+            (F(39), F(15)),
+            (F(9), F(18)),
+        ),
+        (
+            twisted_edwards.TwistedEdwards,
+            (F(1), F(94)),
+            "extended",
+            (F(51), F(21)),
+            (F(43), F(6)),
+        ),
+        (
+            edwards.Edwards,
+            (F(36), F(55)),
+            "extended",
+            (F(29), F(100)),
+            (F(46), F(17)),
+        ),
+    ]
+    for form, params, coordinates, p, q in curves:
+        A = form(*params)
+        C = form(*params, coordinates=coordinates)
+        aP, aQ = Point(A, *p), Point(A, *q)
+        cP, cQ = Point(C, *p), Point(C, *q)
+        for k in range(1, 12):
+            expected = k * aP + aQ
+            result = (k * cP + cQ).affine()
+            assert (result.x, result.y) == (expected.x, expected.y)
+        assert (cP - cP).is_infinity()
+        assert (cP + C.infinity()).affine() == cP
+
+
+def test_montgomery_ladder():
+    F = GF(101)
+    M = montgomery.Montgomery(F(49), F(51))
+    P = Point(M, F(39), F(15))
+    for k in range(1, 60):
+        kP = k * P
+        if kP.is_infinity():
+            assert M.ladder(P.x, k) is None
+            assert M.ladder(P.x, k, lift=True).is_infinity()
+            continue
+        assert M.ladder(P.x, k) == kP.x
+        assert M.ladder(P.x, k, lift=True) in (kP, -kP)
+    T = Point(M, F(0), F(0))
+    for k in range(0, 8):
+        kT = k * T
+        assert M.ladder(F(0), k) == (None if kT.is_infinity() else F(0))
+        assert M.ladder(F(0), k, lift=True) == kT
+
+
+def test_scalar_multiplication():
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    P = Point(W, F(353), F(449))
+    scalars = [0, 1, 2, 3, 7, 100, 1009, 12345, 2**40 + 17, 3**30]
+    for k in scalars:
+        expected = sm.binary_multiply(P, k)
+        for width in range(2, 6):
+            assert sm.wnaf_multiply(P, k, width) == expected
+            assert sm.sliding_window_multiply(P, k, width) == expected
+        assert k * P == expected
+    for width in range(2, 7):
+        for k in [1, 2, 3, 1000, 2**33 + 5]:
+            digits = sm.wnaf(k, width)
+            assert sum(d << i for i, d in enumerate(digits)) == k
+            assert all(d % 2 == 1 and abs(d) < 2 ** (width - 1) for d in digits if d)
+
+
+def test_precomputation_cache():
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    P = Point(W, F(353), F(449))
+    Q = Point(W, F(924), F(356))
+    cache = sm.table_cache
+    max_points = cache.max_points
+    try:
+        cache.max_points = 6
+        P.precompute(4)
+        assert P._precomputed is not None and cache.size == 4
+        assert 12345 * P == sm.binary_multiply(P, 12345)
+        Q.precompute(4)
+        assert P._precomputed is None and cache.size == 4
+        assert 777 * Q == sm.binary_multiply(Q, 777)
+        del Q
+        assert cache.size == 0
+    finally:
+        cache.max_points = max_points
+
+
+def test_fixed_base(tmp_path):
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    T = twisted_edwards.TwistedEdwards(F(519), F(636), coordinates="extended")
+    for G in [Point(W, F(353), F(449)), Point(T, F(188), F(480))]:
+        path = tmp_path / f"{G.curve._form}.json"
+        table = sm.register_base(G, width=3, path=path)
+        try:
+            loaded = sm.register_base(G, width=3, path=path)
+            assert loaded is not table and loaded.bits == table.bits
+            wider = sm.register_base(G, width=4, path=path)
+            assert wider.width == 4 and wider.bits == table.bits
+            longer = sm.register_base(G, width=4, bits=40, path=path)
+            assert longer.bits == 40 and len(longer.rows) == 10
+            stored = sm.FixedBaseTable.load(path, G)
+            assert (stored.width, stored.bits) == (4, 40)
+            k = 2**39 + 5
+            assert same_point(longer.multiply(k), sm.binary_multiply(G, k))
+            table = sm.register_base(G, width=3, path=path)
+            for k in [0, 1, 5, 8, 1000, 2**10 + 3]:
+                expected = sm.binary_multiply(G, k)
+                assert same_point(k * G, expected)
+                assert same_point(table.multiply(k), expected)
+        finally:
+            sm.unregister_base(G)
+        assert sm.FixedBaseTable.key(G) not in sm.fixed_base_tables
+
+
+def same_point(P, Q):
+    if P.is_infinity() or Q.is_infinity():
+        return P.is_infinity() and Q.is_infinity()
+    return P.affine() == Q.affine()
+
+
+def test_multi_scalar_multiply():
+    F = GF(1009)
+    curves = [
+        weierstrass.Weierstrass(F(866), F(208)),
+        montgomery.Montgomery(F(32), F(733), coordinates="projective"),
+        twisted_edwards.TwistedEdwards(F(519), F(636)),
+        edwards.Edwards(F(480), F(141), coordinates="extended"),
+    ]
+    for curve in curves:
+        points = []
+        for x in curve.field:
+            if len(points) == 40:
+                break
+            try:
+                if isinstance(curve, weierstrass.Weierstrass):
+                    y2 = x**3 + curve.a * x + curve.b
+                    if y2.is_square():
+                        points.append(Point(curve, x, y2.sqrt()))
+                elif isinstance(curve, montgomery.Montgomery):
+                    points.append(curve.lift_x(x))
+                else:
+                    points.append(curve.lift_y(x))
+            except NoPoint:
+                continue
+        for count in [1, 2, 3, 4, 5, 17, 40]:
+            scalars = [(i * 7919 + 13) * (-1) ** i for i in range(count)]
+            expected = curve.infinity()
+            for k, P in zip(scalars, points):
+                expected = expected + k * P
+            result = sm.multi_scalar_multiply(scalars, points[:count])
+            assert same_point(result, expected)
+
+
+def test_batch_affine():
+    F = GF(1009)
+    elements = [F(i) for i in range(1, 30)]
+    assert utils.batch_inverse(elements) == [1 / e for e in elements]
+    assert utils.batch_inverse([]) == []
+    W = weierstrass.Weierstrass(F(866), F(208), coordinates="jacobian")
+    P = Point(W, F(353), F(449))
+    points = [k * P for k in range(12)]
+    normalized = utils.batch_affine(points)
+    assert normalized[0].is_infinity()
+    for point, affine in zip(points[1:], normalized[1:]):
+        assert affine.z == 1 and affine == point.affine()
+
+
+def test_map_many():
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208), coordinates="jacobian")
+    P = Point(W, F(353), F(449))
+    points = [k * P for k in range(1, 30)]
+    for equivalence in [
+        be.BirationalEquivalence.to_montgomery(W),
+        be.BirationalEquivalence.to_edwards(W),
+        be.BirationalEquivalence.to_twisted_edwards(W),
+    ]:
+        expected = [equivalence(point) for point in points]
+        assert list(equivalence.map_many(points, chunk_size=7)) == expected
+        assert list(equivalence.map_many(points, check=True)) == expected
+        affine = [(point.x, point.y) for point in utils.batch_affine(points)]
+        raw = list(equivalence.map_many(iter(affine), raw=True))
+        assert raw == [(point.x, point.y) for point in expected]
+        inverse = be.BirationalEquivalence(equivalence.codomain, W)
+        assert list(inverse.map_many(expected)) == [
+            inverse(point) for point in expected
+        ]
+
+
+def test_derived_constants_cached(monkeypatch):
+    import disk_cache
+
+    monkeypatch.setattr(disk_cache, "active", None)
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    hits = utils._shortw_alpha_s_finder.cache_info().hits
+    WE = be.BirationalEquivalence.to_edwards(W)
+    be.BirationalEquivalence.to_montgomery(W)
+    assert utils._shortw_alpha_s_finder.cache_info().hits > hits
+    P = Point(W, F(353), F(449))
+    assert WE._mapping_function.keywords["constants"] is not None
+    assert (WE(P).x, WE(P).y) == be.shortw_to_edward_point(
+        W.params, (P.x, P.y), WE.codomain.params
+    )
+
+
+def test_validation_policy():
+    import point
+
+    F = GF(101)
+    W = weierstrass.Weierstrass(F(1), F(2))
+    P = Point(W, F(77), F(30))
+    checks = []
+    check_point = W.check_point
+    W.check_point = lambda *args: checks.append(args) or check_point(*args)
+    try:
+        assert W.validates_results()
+        P + P
+        assert len(checks) == 1
+        W.set_validation("input")
+        assert (6 * P).affine() == Point(W, F(18), F(14))
+        assert len(checks) == 2
+        shared = weierstrass.Weierstrass(F(1), F(2))
+        assert shared is W and not shared.validates_results()
+        W.set_validation("sample")
+        sample_rate = point.validation_sample_rate
+        try:
+            point.set_validation("always", sample_rate=1.0)
+            P + P
+            assert len(checks) == 3
+        finally:
+            point.set_validation("always", sample_rate=sample_rate)
+        with pytest.raises(ValueError):
+            W.set_validation("sometimes")
+    finally:
+        W.set_validation(None)
+        del W.check_point
+    assert "check_point" not in vars(W)
+    assert weierstrass.Weierstrass(F(1), F(2)).validates_results()
+
+
+def test_raw_arithmetic():
+    F = GF(1009)
+    T = twisted_edwards.TwistedEdwards(F(519), F(636), coordinates="extended")
+    P = Point(T, F(188), F(480))
+    assert not hasattr(P, "__dict__")
+    raw = P.raw()
+    assert raw == (P.x, P.y, P.z, P.t)
+    assert T.from_raw(T.raw_add(raw, raw)) == P + P
+    assert T.from_raw(T.raw_double(raw)).affine() == (P + P).affine()
+    assert T.from_raw(T.raw_negate(raw)) == -P
+    assert T.from_raw(sm.raw_binary_multiply(T, raw, 77)).affine() == (77 * P).affine()
+
+
+def test_prime_field():
+    for p in [101, 1009, 2**255 - 19]:
+        F = field.PrimeField(p)
+        assert F is field.PrimeField(p) and F.order() == p
+        for value in [1, 2, 3, 5, 17, p - 1]:
+            x = F(value)
+            assert x * (1 / x) == 1 and x**-2 * x**2 == 1
+            if x.is_square():
+                assert x.sqrt() ** 2 == x
+            else:
+                with pytest.raises(ValueError):
+                    x.sqrt()
+        assert field.polynomial_roots([F(6), F(-5), F(1)], F) == [F(2), F(3)]
+        assert field.polynomial_roots([F(0), F(0), F(0), F(1)], F) == [F(0)]
+
+
+def test_native_backend_does_not_import_sage():
+    code = "\n".join(
+        [
+            "import sys",
+            "import birational_equivalence as be",
+            "from utils import GF",
+            "from weierstrass import Weierstrass",
+            "F = GF(101)",
+            "W = Weierstrass(F(1), F(2))",
+            "P = W.point(F(77), F(30))",
+            "assert (6 * P).x == 18",
+            "WE = be.BirationalEquivalence.to_edwards(W)",
+            "assert WE(P) + WE(P) == WE(P + P)",
+            "assert 'sage' not in sys.modules",
+        ]
+    )
+    subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(__file__), check=True
+    )
+
+
+def test_square_roots():
+    for p in [103, 101, 1009, 2**255 - 19, 2**127 - 1]:
+        for value in range(1, 200):
+            root = field.sqrt_mod(value, p)
+            assert (root is not None) == (field.legendre(value, p) != -1)
+            if root is not None:
+                assert root * root % p == value % p
+    F = GF(1009)
+    T = twisted_edwards.TwistedEdwards(F(519), F(636))
+    for parity in [0, 1]:
+        P = T.lift_y(F(480), parity=parity)
+        assert int(P.x) % 2 == parity and P.y == 480
+    M = montgomery.Montgomery(F(32), F(733))
+    assert M.lift_x(F(98)).y == min(F(183), -F(183), key=int)
+    with pytest.raises(NoPoint):
+        for x in M.field:
+            M.lift_x(x)
+
+
+def test_enumeration():
+    F = GF(103)
+    curves = [
+        weierstrass.Weierstrass(F(2), F(3)),
+        montgomery.Montgomery(F(5), F(7), coordinates="projective"),
+        twisted_edwards.TwistedEdwards(F(3), F(5)),
+        edwards.Edwards(F(2), F(5), coordinates="extended"),
+    ]
+    for curve in curves:
+        points = list(curve)
+        affine = {P.affine().raw()[:2] for P in points if P.z != 0}
+        expected = {(x, y) for x in F for y in F if curve.check_point(x, y, F(1))}
+        assert affine == expected
+        assert len(points) == len(affine) + (curve.raw_infinity()[2] == 0)
+        assert all(curve.check_point(*P.raw()[:3]) for P in points)
+        parallel = list(curve.points(processes=2, chunk_size=10))
+        assert [P.raw() for P in parallel] == [P.raw() for P in points]
+        assert list(curve.points(raw=True)) == [P.raw() for P in points]
+
+    class Executor:
+        submitted = 0
+
+        def submit(self, function, *args):
+            self.submitted += 1
+            future = Future()
+            future.set_result(function(*args))
+            return future
+
+    executor = Executor()
+    results = enumeration.ordered(executor, abs, iter(range(-100, 0)), 4)
+    assert next(results) == 100 and executor.submitted == 4
+    assert list(results) == list(range(99, 0, -1)) and executor.submitted == 100
+
+
+def test_composed_equivalence(monkeypatch):
+    F = GF(1009)
+    curves = [
+        weierstrass.Weierstrass(F(866), F(208)),
+        montgomery.Montgomery(F(32), F(733)),
+        twisted_edwards.TwistedEdwards(F(519), F(636)),
+        edwards.Edwards(F(480), F(141), coordinates="extended"),
+    ]
+    for domain in curves:
+        points = list(islice(domain.points(), 1, 30))
+        for form in ["shortw", "montgo", "twiedw", "edward"]:
+            try:
+                equivalence = be.BirationalEquivalence.compose(domain, form)
+            except ValueError:
+                continue
+            assert be.BirationalEquivalence.compose(domain, form) is equivalence
+            assert equivalence.path[0] == domain._form
+            assert equivalence.path[-1] == form == equivalence.codomain._form
+            images = []
+            for P in points:
+                try:
+                    images.append(equivalence(P))
+                except ZeroDivisionError:
+                    images.append(None)
+            for P, Q, image in zip(points, points[1:], images):
+                if image is None or (P + Q).z == 0:
+                    continue
+                assert equivalence.codomain.check_point(*image.raw()[:3])
+                try:
+                    expected = equivalence(P + Q)
+                    Q_image = equivalence(Q)
+                except ZeroDivisionError:
+                    continue
+                assert same_point(image + Q_image, expected)
+            mapped = [P for P, image in zip(points, images) if image is not None]
+            assert list(equivalence.map_many(mapped)) == [
+                image for image in images if image is not None
+            ]
+    T = be.BirationalEquivalence.compose(curves[2], "shortw")
+    assert T.path == ("twiedw", "montgo", "shortw")
+
+    monkeypatch.setattr(be, "COMPOSED_LIMIT", 2)
+    curve = weierstrass.Weierstrass(F(3), F(7))
+    reference = weakref.ref(curve)
+    be.BirationalEquivalence.compose(curve, "twiedw")
+    del curve
+    for b in range(8, 10):
+        be.BirationalEquivalence.compose(weierstrass.Weierstrass(F(3), F(b)), "shortw")
+    gc.collect()
+    assert reference() is None and len(be.composed_equivalences) == 2
+
+
+def test_twisted_hessian():
+    F, G = GF(1009), GF(103)
+    for H in [
+        hessian.TwistedHessian(F(5), F(17)),
+        hessian.Hessian(F(3)),
+        hessian.Hessian(G(5)),
+    ]:
+        P = H.with_coordinates("projective")
+        points = list(H)
+        W = weierstrass.Weierstrass(*be.twihes_to_shortw(H.params))
+        assert len(points) == len(list(W)) == len(list(P)) == len(set(points))
+        infinite = {H.from_raw(point) for point in H.raw_points_at_infinity()}
+        assert {Q for Q in points if Q.z == 0} == infinite
+        step = 1 if len(points) < 200 else 37
+        for Q in points:
+            assert Q - Q == H.infinity() and -(-Q) == Q
+            assert H.check_point(*(-Q).raw())
+            assert P.from_raw(H.raw_double(Q.raw())) == P.from_raw((Q + Q).raw())
+            for R in points[::step]:
+                S = Q + R
+                assert H.check_point(*S.raw()) and S - R == Q
+                assert P.from_raw(S.raw()) == P.from_raw(Q.raw()) + P.from_raw(R.raw())
+
+        d = H.d
+        HW = be.BirationalEquivalence(H, W)
+        WH = be.BirationalEquivalence.to_twisted_hessian(W)
+        WHW = be.BirationalEquivalence(WH.codomain, W)
+        constants = be.shortw_to_twihes_constants(W.params, WH.codomain.params)
+
+        def on_line(Q):
+            return d * Q.x + 3 * Q.y + 3 * Q.z == 0
+
+        def on_tangent(Q):
+            u = Q.x + constants[2]
+            return Q.z == 0 or 6 * Q.y == constants[0] * u - constants[1]
+
+        for Q in points:
+            if Q.z != 0 and on_line(Q):
+                with pytest.raises(ZeroDivisionError):
+                    HW(Q)
+        regular = [Q for Q in points if Q.z != 0 and not on_line(Q)]
+        for Q, R in zip(regular, regular[7:]):
+            S = Q + R
+            if S.z == 0 or on_line(S):
+                continue
+            image = HW(S)
+            assert same_point(image, HW(Q) + HW(R))
+            if not on_tangent(image):
+                assert WHW(WH(image)) == image
+    H = hessian.Hessian(G(5))
+    Q = Point(H, G(47), G(0))
+    assert (-Q).z == 0 and H.check_point(*(-Q).raw()) and Q + -Q == H.infinity()
+    assert len(list(H)) == 117
+    M = montgomery.Montgomery(*be.twihes_to_montgo((F(5), F(17))))
+    MH = be.BirationalEquivalence.to_twisted_hessian(M)
+    P = next(P for P in M if not P.is_infinity() and P.y != 0)
+    assert same_point(MH(P + P), MH(P) + MH(P))
+    W = weierstrass.Weierstrass(G(1), G(4))
+    with pytest.raises(Exception, match="does not support"):
+        be.BirationalEquivalence.to_twisted_hessian(W)
+
+
+def test_operation_counting():
+    F = GF(1009)
+    affine = counting.instrument(twisted_edwards.TwistedEdwards(F(519), F(636)))
+    extended = counting.instrument(
+        twisted_edwards.TwistedEdwards(F(519), F(636), coordinates="extended")
+    )
+    assert affine.a.parent() is affine.field
+    for curve in [affine, extended]:
+        curve.set_validation("input")
+        with counting.OperationCounter() as counter:
+            P = curve.lift_y(curve.field(480))
+        assert counter.sites["twisted_edwards.lift_y"]["sqrt"] == 1
+        P, Q = 2 * P, 3 * P
+        with counting.OperationCounter() as outer:
+            with counting.OperationCounter() as counter:
+                P + Q
+        assert counter.as_dict() == outer.as_dict()
+        assert "total" in counter.report()
+        if curve is extended:
+            assert counter.totals["I"] == 0
+            assert counter.sites["twisted_edwards.twiedw_extended_sum"]["M"] == 11
+        else:
+            assert counter.sites["twisted_edwards.twiedw_sum"]["I"] > 0
+    with counting.OperationCounter() as counter:
+        P + Q
+    assert sum(counter.totals.values()) > 0
+    counter.reset()
+    assert not counter.totals
+
+
+def test_benchmark_comparison():
+    baseline = {"version": benchmarks.FORMAT_VERSION, "results": {"a": 1.0, "b": 2.0}}
+    results = {"version": benchmarks.FORMAT_VERSION, "results": {"a": 1.5, "b": 2.0}}
+    rows, regressions = benchmarks.compare(results, baseline, threshold=1.2)
+    assert [row[0] for row in rows] == ["a", "b"]
+    assert [row[0] for row in regressions] == ["a"]
+    with pytest.raises(ValueError):
+        benchmarks.compare(results, {"version": 0, "results": {}})
+    points = benchmarks.curve_family(1009)
+    assert set(points) == {"montgo", "shortw", "twiedw", "edward", "twihes"}
+    for name, function in benchmarks.arithmetic_benchmarks("tiny", points).items():
+        function()
+
+
+def test_tracing():
+    import point
+
+    F = GF(1009)
+    T = twisted_edwards.TwistedEdwards(F(519), F(636), coordinates="extended")
+    P = T.lift_y(F(480))
+    addition = point.Curve.addition
+    seen = []
+    tracing.reset()
+    tracing.add_hook(lambda operation, seconds: seen.append(operation))
+    try:
+        with tracing.traced():
+            assert tracing.enabled()
+            Q = 5 * P + P
+            Q.affine()
+            equivalence = be.BirationalEquivalence.to_weierstrass(T)
+            equivalence(Q)
+            list(equivalence.map_many([Q, P]))
+    finally:
+        tracing.hooks.clear()
+    assert not tracing.enabled()
+    assert point.Curve.addition is addition
+    stats = tracing.as_dict()
+    assert stats["Point.__rmul__"]["count"] == 1
+    assert stats["Curve.addition"]["count"] >= 1
+    assert stats["TwistedEdwards.check_point"]["count"] >= 1
+    assert stats["BirationalEquivalence.__call__[twiedw->shortw]"]["count"] >= 1
+    assert stats["BirationalEquivalence.map_many[twiedw->shortw]"]["count"] == 1
+    assert set(seen) == set(stats)
+    for histogram in stats.values():
+        assert histogram["buckets"]["+Inf"] == histogram["count"]
+    text = tracing.prometheus()
+    assert '_count{operation="Point.affine"} ' in text
+    assert "# TYPE curve_forms_operation_seconds histogram" in text
+    P + P
+    assert tracing.as_dict() == stats
+    tracing.reset()
+
+
+def test_interned_curves_and_point_hashing():
+    import pickle
+
+    def scale(curve, raw, l):
+        if curve.coordinates == "jacobian":
+            return raw[0] * l**2, raw[1] * l**3, raw[2] * l
+        return tuple(c * l for c in raw)
+
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    assert weierstrass.Weierstrass(F(866), F(208), "affine") is W
+    assert weierstrass.Weierstrass(a=F(866), b=F(208)) is W
+    assert weierstrass.Weierstrass(F(866), F(209)) is not W
+    assert pickle.loads(pickle.dumps(W)) is W
+    J = W.with_coordinates("jacobian")
+    assert J is weierstrass.Weierstrass(F(866), F(208), coordinates="jacobian")
+    assert J is not W and J.with_coordinates("affine") is W
+
+    curves = [
+        J,
+        montgomery.Montgomery(F(32), F(733)),
+        twisted_edwards.TwistedEdwards(F(519), F(636)),
+        edwards.Edwards(F(480), F(141), coordinates="extended"),
+        hessian.TwistedHessian(F(2), F(5), coordinates="projective"),
+    ]
+    for curve in curves:
+        points = list(islice(curve.points(), 1, 12))
+        P, Q = points[3], points[7]
+        for R in (P + Q, 2 * P, P + Q - P):
+            scaled = curve.from_raw(scale(curve, R.raw(), F(17)))
+            assert scaled == R and hash(scaled) == hash(R)
+            assert scaled.raw() != R.raw()
+            assert R == R.affine() and hash(R.affine()) == hash(R)
+        assert P != Q and P != P.affine().raw()
+        assert len({*points, *(R.affine() for R in points)}) == len(points)
+        infinity = Q - Q
+        assert infinity == curve.from_raw(curve.raw_infinity())
+        assert hash(infinity) == hash(curve.from_raw(curve.raw_infinity()))
+    assert Point(W, F(353), F(449)) != Point(J, F(353), F(449))
+
+
+def test_point_encoding(tmp_path):
+    F = GF(1009)
+    curves = [
+        weierstrass.Weierstrass(F(866), F(208), coordinates="jacobian"),
+        montgomery.Montgomery(F(32), F(733), coordinates="projective"),
+        twisted_edwards.TwistedEdwards(F(519), F(636), coordinates="extended"),
+        edwards.Edwards(F(480), F(141), coordinates="extended"),
+        hessian.TwistedHessian(F(2), F(5)),
+    ]
+    for curve in curves:
+        points = [3 * P for P in islice(curve.points(), 40)]
+        for compressed in (True, False):
+            if compressed and curve._form == "twihes":
+                with pytest.raises(ValueError):
+                    encoding.encode(points[1])
+                continue
+            size = encoding.point_length(curve, compressed)
+            for P in points:
+                data = encoding.encode(P, compressed)
+                assert len(data) == size
+                assert encoding.decode(curve, data, compressed) == P
+            data = encoding.encode_many(points, compressed)
+            assert data == b"".join(encoding.encode(P, compressed) for P in points)
+            assert encoding.decode_many(curve, data, compressed) == points
+            path = tmp_path / f"{curve._form}-{compressed}.points"
+            assert encoding.write_store(path, curve, iter(points), compressed) == 40
+            with encoding.PointStore(path, curve) as store:
+                assert len(store) == 40
+                assert list(store) == points
+                assert store[-1] == points[-1] and store[5:9] == points[5:9]
+                assert store.encoded(7) == encoding.encode(points[7], compressed)
+    F25519 = GF(2**255 - 19)
+    assert encoding.point_length(weierstrass.Weierstrass(F25519(1), F25519(7))) == 32
+    W = curves[0]
+    with pytest.raises(ValueError):
+        encoding.PointStore(tmp_path / "shortw-True.points", curves[1])
+    with pytest.raises(ValueError):
+        encoding.decode(W, (2000).to_bytes(2, "little"))
+    x = next(x for x in range(1009) if not (F(x) ** 3 + W.a * F(x) + W.b).is_square())
+    with pytest.raises(NoPoint):
+        encoding.decode(W, x.to_bytes(2, "little"))
+
+
+def test_complete_weierstrass_addition():
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(2), F(5))
+    P = W.with_coordinates("projective")
+    assert P.has_complete_addition() and not W.has_complete_addition()
+
+    def projective(Q):
+        return P.from_raw(P.raw_affine(Q.x, Q.y)) if Q.z else P.infinity()
+
+    points = [W.infinity()] + list(islice(W.points(), 1, 60))
+    for Q in points:
+        for R in points + [-Q]:
+            S = projective(Q) + projective(R)
+            assert S.raw() != (0, 0, 0) and S == projective(Q + R)
+        assert P.from_raw(P.raw_double(projective(Q).raw())) == projective(Q + Q)
+    assert 979 * projective(points[1]) == P.infinity()
+    even = weierstrass.Weierstrass(F(866), F(208), coordinates="projective")
+    assert not even.has_complete_addition()
+    assert not even.check_point(F(0), F(0), F(0))
+    affine = even.with_coordinates("affine")
+
+    def lift(Q):
+        return even.from_raw(even.raw_affine(Q.x, Q.y)) if Q.z else even.infinity()
+
+    points = [affine.infinity()] + list(affine.points())
+    for Q in points[::7]:
+        for R in points:
+            S = lift(Q) + lift(R)
+            assert S.raw() != (0, 0, 0) and S == lift(Q + R)
+        assert even.from_raw(even.raw_double(lift(Q).raw())) == lift(Q + Q)
+    S = even.from_raw(even.raw_add((F(2), F(491), F(1)), (F(910), F(692), F(1))))
+    assert S == even.from_raw((F(161), F(255), F(1)))
+    assert not montgomery.Montgomery(F(32), F(733)).has_complete_addition()
+
+
+def test_vectorized_backend():
+    pytest.importorskip("numpy")
+    import vectorized
+
+    F = GF(1009)
+    curves = [
+        weierstrass.Weierstrass(F(866), F(208)),
+        montgomery.Montgomery(F(32), F(733)),
+        twisted_edwards.TwistedEdwards(F(519), F(636)),
+        edwards.Edwards(F(480), F(141)),
+    ]
+    for curve in curves:
+        points = list(islice(curve.points(), 0, 120))
+        others = points[::-1]
+        A = vectorized.PointArray.from_points(points)
+        B = vectorized.PointArray.from_points(others)
+        assert (A + B).to_points() == [P + Q for P, Q in zip(points, others)]
+        assert (A - A).to_points() == [P - P for P in points]
+        assert A.double().to_points() == [P + P for P in points]
+        assert (37 * A).to_points() == [37 * P for P in points]
+        scalars = [(-1) ** i * (i * 2**64 + 12345 * i) for i in range(len(points))]
+        assert (scalars * A).to_points() == [k * P for k, P in zip(scalars, points)]
+        for form in ["shortw", "montgo", "twiedw", "edward"]:
+            if form == curve._form:
+                continue
+            equivalence = be.BirationalEquivalence.compose(curve, form)
+            domain, images = [], []
+            for P in points[1:]:
+                try:
+                    images.append(equivalence(P))
+                except ZeroDivisionError:
+                    continue
+                domain.append(P)
+            mapped = vectorized.PointArray.from_points(domain).map(equivalence)
+            assert mapped.to_points() == images
+            native = vectorized._native_equivalence(equivalence)
+            assert vectorized._native_equivalence(equivalence) is native
+            assert native.path == equivalence.path
+            assert native.codomain is vectorized.native_curve(equivalence.codomain)
+    inverses = vectorized.batch_inverse(vectorized.numpy.arange(1, 1009), 1009)
+    assert all(int(i) * k % 1009 == 1 for k, i in enumerate(inverses, 1))
+    large = GF(2**61 - 1)
+    with pytest.raises(ValueError):
+        vectorized.PointArray(weierstrass.Weierstrass(large(1), large(3)), [], [])
+
+
+def test_batch_service():
+    import parallel
+
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208), coordinates="jacobian")
+    M = montgomery.Montgomery(F(32), F(733))
+    points = list(islice(W.points(), 1, 80))
+    jobs = [(k * 7919 - 300, P) for k, P in enumerate(points)]
+    jobs += [(k, P) for k, P in zip(range(5, 50), islice(M.points(), 1, None))]
+    equivalence = be.BirationalEquivalence.compose(W, "twiedw")
+    images = list(equivalence.map_many(points))
+    for processes in (None, 2):
+        with parallel.BatchService(
+            curves=[M],
+            equivalences=[equivalence],
+            bases=[points[0]],
+            processes=processes,
+            chunk_size=7,
+        ) as service:
+            assert list(service.multiply(jobs)) == [k * P for k, P in jobs]
+            assert list(service.convert(equivalence, iter(points))) == images
+            raw = list(service.convert(equivalence, (P.raw() for P in points), True))
+            assert raw == [P.raw()[:2] for P in images]
+            with pytest.raises(ValueError):
+                list(service.multiply([(2, edwards.Edwards(F(1), F(3)).infinity())]))
+            assert sm.FixedBaseTable.key(points[0]) in sm.fixed_base_tables
+        assert sm.FixedBaseTable.key(points[0]) not in sm.fixed_base_tables
+
+
+def test_convert_cli(tmp_path, monkeypatch):
+    import convert
+
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    equivalence = be.BirationalEquivalence.compose(W, "twiedw")
+    points = [W.infinity()] + list(islice(W.points(), 1, 60))
+    expected = list(convert.convert_points(equivalence, iter(points)))
+    assert len(expected) == len(points) and expected[0].is_infinity()
+    curve_args = ["--form", "shortw", "--prime", "1009", "--params", "866", "208"]
+    source = tmp_path / "points.jsonl"
+    with open(source, "w") as f:
+        convert.write_jsonl(f, points)
+    target = tmp_path / "out.csv"
+    args = curve_args + ["--to", "twiedw", "--output-format", "csv", "-o", str(target)]
+    assert convert.main(args + [str(source)]) == 0
+    with open(target, newline="") as f:
+        assert list(convert.read_csv(f, equivalence.codomain)) == expected
+
+    binary = tmp_path / "points.bin"
+    with open(binary, "wb") as f:
+        convert.write_binary(f, points, chunk_size=7)
+    target = tmp_path / "out.bin"
+    args = curve_args + ["--to", "twiedw", "--input-format", "binary"]
+    args += ["--processes", "2", "--chunk-size", "8", "-o", str(target)]
+    assert convert.main(args + [str(binary), str(binary)]) == 0
+    with open(target, "rb") as f:
+        images = list(convert.read_binary(f, equivalence.codomain))
+    assert images == expected + expected
+
+    args = curve_args + ["--to", "twihes", "--output-format", "binary"]
+    args += ["-o", str(target), str(source)]
+    with pytest.raises(SystemExit):
+        convert.main(args)
+    assert convert.main(args + ["--uncompressed"]) == 0
+    hessian_map = be.BirationalEquivalence.compose(W, "twihes")
+    with open(target, "rb") as f:
+        images = list(convert.read_binary(f, hessian_map.codomain, False))
+    assert images == list(convert.convert_points(hessian_map, iter(points)))
+
+    checks = []
+    check_point = weierstrass.Weierstrass.check_point
+
+    def counted(self, *coordinates):
+        checks.append(coordinates)
+        return check_point(self, *coordinates)
+
+    monkeypatch.setattr(weierstrass.Weierstrass, "check_point", counted)
+    args = curve_args + ["--to", "twiedw", "-o", str(target), str(source)]
+    assert convert.main(args) == 0
+    assert len(checks) == len(points)
+    checks.clear()
+    assert convert.main(args + ["--trust-input"]) == 0
+    assert len(checks) == 1
+    monkeypatch.undo()
+
+    T = twisted_edwards.TwistedEdwards(F(519), F(636))
+    to_shortw = be.BirationalEquivalence.compose(T, "shortw")
+    source = tmp_path / "twisted.jsonl"
+    with open(source, "w") as f:
+        f.write("null\n")
+        convert.write_jsonl(f, [P for P in islice(T.points(), 1, 30) if P.x != 0])
+        f.write("null\n")
+    target = tmp_path / "shortw.jsonl"
+    args = ["--form", "twiedw", "--prime", "1009", "--params", "519", "636"]
+    assert convert.main(args + ["--to", "shortw", "-o", str(target), str(source)]) == 0
+    with open(source) as f:
+        points = list(convert.read_jsonl(f, T))
+    with open(target) as f:
+        images = list(convert.read_jsonl(f, to_shortw.codomain))
+    assert images[0].is_infinity() and images[-1].is_infinity()
+    assert images[1:-1] == [to_shortw(P) for P in points[1:-1]]
+
+    source = tmp_path / "points.jsonl"
+    with open(source, "a") as f:
+        f.write('{"x": 1, "y": 1}\n')
+    with pytest.raises(NoPoint):
+        convert.main(curve_args + ["--to", "montgo", "-o", str(target), str(source)])
+
+
+def test_disk_cache(tmp_path, monkeypatch):
+    import disk_cache
+
+    F = GF(1009)
+    W = weierstrass.Weierstrass(F(866), F(208))
+    odd = weierstrass.Weierstrass(F(2), F(5))
+    P = Point(W, F(353), F(449))
+    BE = be.BirationalEquivalence
+    expected = {"edward": BE.to_edwards(W), "montgo": BE.to_montgomery(W)}
+    cache = disk_cache.enable(tmp_path)
+    try:
+        BE.to_edwards(W)
+        BE.to_montgomery(W)
+        with pytest.raises(Exception, match="does not support"):
+            BE.to_montgomery(odd)
+        stored = len(cache.entries())
+        assert stored == 5 and cache.misses == stored and cache.hits == 0
+
+        def unavailable(*args, **kwargs):
+            raise AssertionError("derived data should come from the cache")
+
+        monkeypatch.setattr(be, "shortw_alpha_s_finder", unavailable)
+        monkeypatch.setattr(be, "sqrt", unavailable)
+        cache = disk_cache.enable(tmp_path)
+        edwards_map = BE.to_edwards(W)
+        assert edwards_map.codomain is expected["edward"].codomain
+        assert edwards_map(P) == expected["edward"](P)
+        assert BE.to_montgomery(W)(P) == expected["montgo"](P)
+        with pytest.raises(Exception, match="does not support"):
+            BE.to_montgomery(odd)
+        assert cache.hits == stored and len(cache.entries()) == stored
+
+        monkeypatch.setattr(disk_cache, "DERIVATION_VERSION", 2)
+        with pytest.raises(AssertionError):
+            BE.to_edwards(W)
+
+        monkeypatch.undo()
+        keys = []
+        for _, _, path in cache.entries():
+            with open(path) as f:
+                keys.append(json.load(f)["key"])
+        for record in ({}, {"error": "KeyError", "args": []}, {"value": "x"}, [1]):
+            for key in keys:
+                cache.put(key, record)
+            assert BE.to_edwards(W).codomain is expected["edward"].codomain
+            assert BE.to_montgomery(W)(P) == expected["montgo"](P)
+
+        small = disk_cache.DiskCache(tmp_path / "small", max_bytes=1000)
+        for i in range(50):
+            small.put(["entry", i], list(range(10)))
+        assert 0 < small.size() <= 1000
+        assert small.get(["entry", 49]) == list(range(10))
+        assert small.get(["entry", 0]) is None
+    finally:
+        disk_cache.disable()
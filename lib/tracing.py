@@ -0,0 +1,166 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+import point as pt
+from birational_equivalence import BirationalEquivalence
+
+BUCKETS = tuple(m * 10.0**e for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+METRIC = "curve_forms_operation_seconds"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def as_dict(self):
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip(bounds, self.cumulative())),
+        }
+
+
+histograms = {}
+hooks = []
+_originals = {}
+
+
+def observe(operation: str, seconds: float):
+    histogram = histograms.get(operation)
+    if histogram is None:
+        histogram = histograms[operation] = Histogram()
+    histogram.observe(seconds)
+    for hook in hooks:
+        hook(operation, seconds)
+
+
+def add_hook(hook):
+    hooks.append(hook)
+
+
+def remove_hook(hook):
+    hooks.remove(hook)
+
+
+def _curve_classes(cls=pt.Curve):
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _curve_classes(subclass)
+
+
+def _targets():
+    targets = [
+        (pt.Curve, "addition"),
+        (pt.Curve, "negative"),
+        (pt.Point, "affine"),
+        (pt.Point, "__rmul__"),
+        (BirationalEquivalence, "__call__"),
+        (BirationalEquivalence, "map_many"),
+    ]
+    for cls in _curve_classes():
+        if "check_point" in vars(cls):
+            targets.append((cls, "check_point"))
+    return targets
+
+
+def _label(cls, name: str):
+    if cls is BirationalEquivalence:
+        return lambda self: f"{cls.__name__}.{name}[{'->'.join(self.path)}]"
+    label = f"{cls.__name__}.{name}"
+    return lambda self: label
+
+
+def _timed(function, label):
+    @wraps(function)
+    def timed(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            observe(label(self), perf_counter() - start)
+
+    return timed
+
+
+def _timed_generator(function, label):
+    @wraps(function)
+    def timed(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            yield from function(self, *args, **kwargs)
+        finally:
+            observe(label(self), perf_counter() - start)
+
+    return timed
+
+
+def enable():
+    for cls, name in _targets():
+        if (cls, name) in _originals:
+            continue
+        function = vars(cls)[name]
+        wrapper = _timed_generator if name == "map_many" else _timed
+        _originals[cls, name] = function
+        setattr(cls, name, wrapper(function, _label(cls, name)))
+
+
+def disable():
+    while _originals:
+        (cls, name), function = _originals.popitem()
+        setattr(cls, name, function)
+
+
+def enabled():
+    return bool(_originals)
+
+
+def reset():
+    histograms.clear()
+
+
+@contextmanager
+def traced():
+    was_enabled = enabled()
+    enable()
+    try:
+        yield histograms
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def as_dict():
+    return {operation: h.as_dict() for operation, h in sorted(histograms.items())}
+
+
+def prometheus():
+    lines = [
+        f"# HELP {METRIC} Latency of curve_forms operations.",
+        f"# TYPE {METRIC} histogram",
+    ]
+    for operation, histogram in sorted(histograms.items()):
+        label = operation.replace("\\", "\\\\").replace('"', '\\"')
+        for bound, count in histogram.as_dict()["buckets"].items():
+            lines.append(
+                f'{METRIC}_bucket{{operation="{label}",le="{bound}"}} {count}'
+            )
+        lines.append(f'{METRIC}_sum{{operation="{label}"}} {histogram.sum}')
+        lines.append(f'{METRIC}_count{{operation="{label}"}} {histogram.count}')
+    return "\n".join(lines) + "\n"
@@ -1,58 +1,85 @@
-from utils import GF, sqrt
-from point import Point, Curve
+from utils import GF, square_root, sqrt
+from point import NoPoint, Point, Curve
 
 
 class TwistedEdwards(Curve):
-    def __init__(self, a: GF, d: GF):
+    coordinate_systems = ("affine", "extended")
+
+    def __init__(self, a: GF, d: GF, coordinates="affine"):
         self.a = a
         self.d = d
         self.field = a.parent()
         self._form = "twiedw"
         self.params = (a, d)
+        self._set_coordinates(coordinates)
+
+    def raw_add(self, point1, point2):
+        if self.coordinates == "extended":
+            return twiedw_extended_sum(self.params, point1, point2)
+        spoint = twiedw_sum(self.params, point1[:2], point2[:2])
+        return spoint[0], spoint[1], 1
+
+    def raw_double(self, point):
+        if self.coordinates == "extended":
+            return twiedw_extended_dbl(self.params, point)
+        spoint = twiedw_dbl(self.params, point[:2])
+        return spoint[0], spoint[1], 1
+
+    def raw_negate(self, point):
+        if len(point) == 4:
+            x, y, z, t = point
+            return -x, y, z, -t
+        x, y, z = point
+        return -x, y, z
 
-    def addition(self, point1, point2):
-        spoint = twiedw_sum(
-            (self.a, self.d), (point1.x, point1.y), (point2.x, point2.y)
-        )
-        return Point(self, spoint[0], spoint[1])
+    def raw_affine(self, x, y):
+        if self.coordinates == "extended":
+            return x, y, 1, x * y
+        return x, y, 1
 
     def is_infinity(self, x, y, z):
-        return x == 0 and y == 1
+        return x == 0 and y == z
 
-    def infinity(self):
-        return Point(self, self.field(0), self.field(1))
+    def raw_infinity(self):
+        return self.raw_affine(self.field(0), self.field(1))
 
     def form(self):
         return "Twisted Edwards"
 
-    def negative(self, point):
-        return Point(self, -point.x, point.y, point.z)
-
     def check_point(self, x, y, z=1):
-        return self.a * x**2 + y**2 == 1 + self.d * x**2 * y**2
+        z2 = z**2
+        return (self.a * x**2 + y**2) * z2 == z2**2 + self.d * x**2 * y**2
 
     def __repr__(self):
         return f"Twisted Edwards curve {self.a}x^2+y^2=1+{self.d}x^2y^2 over F_{self.field.order()}"
 
-    def lift_y(self, y):
-        x = PolynomialRing(self.field, "x").gen()
-        roots = (self.a * x**2 + y**2 - 1 - self.d * x**2 * y**2).roots()
-        if roots == []:
+    def has_complete_addition(self):
+        return self.a.is_square() and not self.d.is_square()
+
+    def lift_y(self, y, parity=None):
+        y2 = y**2
+        denominator = self.a - self.d * y2
+        if denominator == 0:
+            raise NoPoint("No such point")
+        x = square_root((1 - y2) / denominator, parity)
+        if x is None:
             raise NoPoint("No such point")
-        return Point(self, roots[0][0], y)
-
-    def __iter__(self):
-        try:
-            for y in self.field:
-                try:
-                    point = self.lift_y(y)
-                    yield point
-                    if not point.x == 0:
-                        yield -point
-                except NoPoint:
-                    continue
-        except GeneratorExit:
-            pass
+        return Point.trusted(self, x, y)
+
+    def enumerate_range(self, start, stop, root):
+        p = int(self.field.order())
+        a, d = int(self.a), int(self.d)
+        for y in range(start, stop):
+            numerator, denominator = (1 - y * y) % p, (a - d * y * y) % p
+            if denominator == 0:
+                continue
+            r = root(numerator * denominator % p)
+            if r is not None:
+                x = r * pow(denominator, -1, p) % p
+                x = min(x, p - x)
+                yield x, y
+                if x:
+                    yield p - x, y
 
 
 def twiedw_sum(twiedw: tuple, point1: tuple, point2: tuple):
@@ -66,3 +93,40 @@ def twiedw_sum(twiedw: tuple, point1: tuple, point2: tuple):
 
 def twiedw_dbl(twiedw: tuple, point: tuple):
     return twiedw_sum(twiedw, point, point)
+
+
+def twiedw_extended_sum(twiedw: tuple, point1: tuple, point2: tuple):
+    a, d = twiedw
+    x1, y1, z1, t1 = point1
+    x2, y2, z2, t2 = point2
+    aa = x1 * x2
+    b = y1 * y2
+    c = d * t1 * t2
+    dd = z1 * z2
+    e = (x1 + y1) * (x2 + y2) - aa - b
+    f = dd - c
+    g = dd + c
+    h = b - a * aa
+    x3 = e * f
+    y3 = g * h
+    t3 = e * h
+    z3 = f * g
+    return x3, y3, z3, t3
+
+
+def twiedw_extended_dbl(twiedw: tuple, point: tuple):
+    a, d = twiedw
+    x1, y1, z1, _ = point
+    aa = x1**2
+    b = y1**2
+    c = 2 * z1**2
+    dd = a * aa
+    e = (x1 + y1) ** 2 - aa - b
+    g = dd + b
+    f = g - c
+    h = dd - b
+    x3 = e * f
+    y3 = g * h
+    t3 = e * h
+    z3 = f * g
+    return x3, y3, z3, t3
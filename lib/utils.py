@@ -1,26 +1,153 @@
-import sage.all as sage
+import importlib
+from functools import lru_cache
+from field import PrimeField, polynomial_roots, sqrt_mod
+from counting import CountingField, record
+
+GF = PrimeField
+
+
+def sage():
+    return importlib.import_module("sage.all")
+
+
+def PolynomialRing(*args, **kwargs):
+    return sage().PolynomialRing(*args, **kwargs)
+
+
+def roots(field, coefficients: list):
+    if isinstance(field, CountingField):
+        coefficients = [field.base(int(c)) for c in coefficients]
+        return [field(root) for root in roots(field.base, coefficients)]
+    if isinstance(field, PrimeField):
+        return polynomial_roots(coefficients, field)
+    z = PolynomialRing(field, "z").gen()
+    polynomial = sum(c * z**i for i, c in enumerate(coefficients))
+    return [root for root, _ in polynomial.roots()]
 
-GF = sage.GF
-PolynomialRing = sage.PolynomialRing
 
 def shortw_alpha_s_finder(shortw: tuple, all=False):
+    return _shortw_alpha_s_finder(shortw[0].parent(), tuple(shortw), all)
+
+
+@lru_cache(maxsize=256)
+def _shortw_alpha_s_finder(field, shortw: tuple, all):
     a, b = shortw
     result = []
-    z = sage.PolynomialRing(a.parent(), "z").gen()
-    for alpha, _ in (z**3 + a * z + b).roots():
+    for alpha in roots(field, [b, a, 0, 1]):
         if (3 * alpha**2 + a).is_square():
             s = 1 / (sqrt(3 * alpha**2 + a))
             if not all:
                 return alpha, s
             result.append((alpha, s))
     if result:
-        return result
+        return tuple(result)
     raise Exception("The curve does not support this form.")
 
 
 def sqrt(x):
-    p = x.parent().order()
-    sqrt_x = sage.sqrt(x)
-    if not sqrt_x in x.parent():
+    sqrt_x = square_root(x)
+    if sqrt_x is None:
         raise Exception("No squareroot")
-    return sqrt_x if int(sqrt_x) < int(p - sqrt_x) else -sqrt_x
+    return sqrt_x
+
+
+def square_root(x, parity=None):
+    record("sqrt")
+    field = x.parent()
+    p = int(field.order())
+    root = sqrt_mod(int(x), p)
+    if root is None:
+        return None
+    if parity is None:
+        flip = 2 * root > p
+    else:
+        flip = root % 2 != parity
+    if root and flip:
+        root = p - root
+    return field(root)
+
+
+def batch_inverse(elements: list):
+    if not elements:
+        return []
+    prefix = [elements[0]]
+    for element in elements[1:]:
+        prefix.append(prefix[-1] * element)
+    inverse = 1 / prefix[-1]
+    inverses = [None] * len(elements)
+    for i in range(len(elements) - 1, 0, -1):
+        inverses[i] = inverse * prefix[i - 1]
+        inverse = inverse * elements[i]
+    inverses[0] = inverse
+    return inverses
+
+
+def batch_normalize(curve, points: list):
+    pending = [i for i, point in enumerate(points) if point[2] != 1 and point[2] != 0]
+    inverses = batch_inverse([points[i][2] for i in pending])
+    result = list(points)
+    for i, z_inverse in zip(pending, inverses):
+        x, y = curve.affine_coordinates(points[i][0], points[i][1], z_inverse)
+        result[i] = curve.raw_affine(x, y)
+    return result
+
+
+def batch_affine(points: list):
+    pending = [i for i, point in enumerate(points) if point.z != 1 and point.z != 0]
+    inverses = batch_inverse([points[i].z for i in pending])
+    result = list(points)
+    for i, z_inverse in zip(pending, inverses):
+        point = points[i]
+        x, y = point.curve.affine_coordinates(point.x, point.y, z_inverse)
+        result[i] = type(point).trusted(point.curve, x, y)
+    return result
+
+
+class Quotient:
+    __slots__ = ("num", "den")
+
+    def __init__(self, num, den=1):
+        self.num = num
+        self.den = den
+
+    @staticmethod
+    def _split(other):
+        if isinstance(other, Quotient):
+            return other.num, other.den
+        return other, 1
+
+    def __add__(self, other):
+        num, den = self._split(other)
+        return Quotient(self.num * den + num * self.den, self.den * den)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        num, den = self._split(other)
+        return Quotient(self.num * den - num * self.den, self.den * den)
+
+    def __rsub__(self, other):
+        num, den = self._split(other)
+        return Quotient(num * self.den - self.num * den, self.den * den)
+
+    def __mul__(self, other):
+        num, den = self._split(other)
+        return Quotient(self.num * num, self.den * den)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        num, den = self._split(other)
+        return Quotient(self.num * den, self.den * num)
+
+    def __rtruediv__(self, other):
+        num, den = self._split(other)
+        return Quotient(num * self.den, den * self.num)
+
+    def __neg__(self):
+        return Quotient(-self.num, self.den)
+
+    def __pow__(self, exponent: int):
+        if exponent < 0:
+            return Quotient(self.den**-exponent, self.num**-exponent)
+        return Quotient(self.num**exponent, self.den**exponent)
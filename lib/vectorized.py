@@ -0,0 +1,331 @@
+from copy import copy
+from functools import partial
+from weakref import WeakKeyDictionary
+from edwards import edward_dbl, edward_sum
+from montgomery import montgo_dbl, montgo_sum
+from twisted_edwards import twiedw_dbl, twiedw_sum
+from utils import GF, batch_affine
+from weierstrass import shortw_dbl, shortw_sum
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LIMIT = 1 << 31
+LIMB = 62
+FORMULAS = {
+    "shortw": (shortw_sum, shortw_dbl),
+    "montgo": (montgo_sum, montgo_dbl),
+    "twiedw": (twiedw_sum, twiedw_dbl),
+    "edward": (edward_sum, edward_dbl),
+}
+WITH_INFINITY = ("shortw", "montgo")
+
+
+def batch_inverse(values, p: int):
+    levels = [values]
+    while len(levels[-1]) > 1:
+        level = _even(levels[-1])
+        levels.append(level[0::2] * level[1::2] % p)
+    inverse = numpy.array([pow(int(levels[-1][0]), -1, p)], dtype=numpy.int64)
+    for level in reversed(levels[:-1]):
+        padded = _even(level)
+        children = numpy.empty_like(padded)
+        children[0::2] = inverse * padded[1::2] % p
+        children[1::2] = inverse * padded[0::2] % p
+        inverse = children[: len(level)]
+    return inverse
+
+
+def _even(values):
+    if len(values) % 2:
+        return numpy.append(values, 1)
+    return values
+
+
+class VectorElement:
+    __slots__ = ("p", "values")
+
+    def __init__(self, p: int, values):
+        self.p = p
+        self.values = values
+
+    def _coerce(self, other):
+        if isinstance(other, VectorElement):
+            return other.values
+        return int(other) % self.p
+
+    def _wrap(self, values):
+        return VectorElement(self.p, values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __add__(self, other):
+        return self._wrap((self.values + self._coerce(other)) % self.p)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._wrap((self.values - self._coerce(other)) % self.p)
+
+    def __rsub__(self, other):
+        return self._wrap((self._coerce(other) - self.values) % self.p)
+
+    def __mul__(self, other):
+        return self._wrap(self.values * self._coerce(other) % self.p)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if not isinstance(other, VectorElement):
+            return self * pow(self._coerce(other), -1, self.p)
+        return self * other.inverse()
+
+    def __rtruediv__(self, other):
+        return self.inverse() * other
+
+    def __pow__(self, exponent: int):
+        exponent = int(exponent)
+        if exponent < 0:
+            return self.inverse() ** -exponent
+        result = self._wrap(numpy.ones_like(self.values))
+        square = self
+        while exponent:
+            if exponent & 1:
+                result = result * square
+            exponent >>= 1
+            if exponent:
+                square = square * square
+        return result
+
+    def __neg__(self):
+        return self._wrap(-self.values % self.p)
+
+    def __pos__(self):
+        return self
+
+    def inverse(self):
+        if not self.values.all():
+            raise ZeroDivisionError("Vector element has a zero lane")
+        return self._wrap(batch_inverse(self.values, self.p))
+
+    def __eq__(self, other):
+        return bool(numpy.all(self.values == self._coerce(other)))
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"VectorElement({self.values!r} mod {self.p})"
+
+
+def native_curve(curve):
+    field = GF(int(curve.field.order()))
+    return type(curve)(
+        **{
+            name: field(int(value)) if hasattr(value, "parent") else value
+            for name, value in curve._arguments.items()
+        }
+    )
+
+
+def _native_value(value, field):
+    if isinstance(value, partial):
+        return partial(
+            value.func,
+            *(_native_value(arg, field) for arg in value.args),
+            **{key: _native_value(arg, field) for key, arg in value.keywords.items()},
+        )
+    if isinstance(value, tuple):
+        return tuple(_native_value(item, field) for item in value)
+    if hasattr(value, "parent"):
+        return field(int(value))
+    return value
+
+
+def _native_equivalence(equivalence):
+    native = native_equivalences.get(equivalence)
+    if native is None:
+        native = copy(equivalence)
+        native.domain = native_curve(equivalence.domain)
+        native.codomain = native_curve(equivalence.codomain)
+        native.field = native.domain.field
+        native._mapping_function = _native_value(
+            equivalence._mapping_function, native.field
+        )
+        native_equivalences[equivalence] = native
+    return native
+
+
+native_equivalences = WeakKeyDictionary()
+
+
+class PointArray:
+    def __init__(self, curve, x, y, infinity=None):
+        if numpy is None:
+            raise ImportError("The vectorized backend needs NumPy")
+        self.p = int(curve.field.order())
+        if self.p >= LIMIT:
+            raise ValueError("The vectorized backend needs a prime below 2^31")
+        if curve._form not in FORMULAS:
+            raise ValueError(f"{curve.form()} curves are not vectorized")
+        self.curve = curve
+        self.native = native_curve(curve)
+        self.params = tuple(int(param) for param in curve.params)
+        self.x = numpy.asarray(x, dtype=numpy.int64) % self.p
+        self.y = numpy.asarray(y, dtype=numpy.int64) % self.p
+        if infinity is None:
+            infinity = numpy.zeros(len(self.x), dtype=bool)
+        self.infinity = numpy.asarray(infinity, dtype=bool)
+
+    @classmethod
+    def from_points(cls, points, curve=None):
+        points = batch_affine(list(points))
+        if curve is None:
+            curve = points[0].curve
+        infinity = [point.z == 0 for point in points]
+        x = [0 if inf else int(point.x) for point, inf in zip(points, infinity)]
+        y = [0 if inf else int(point.y) for point, inf in zip(points, infinity)]
+        return cls(curve, x, y, infinity)
+
+    @classmethod
+    def identity(cls, curve, size: int):
+        zeros = numpy.zeros(size, dtype=numpy.int64)
+        points = cls(curve, zeros, zeros.copy())
+        if curve._form in WITH_INFINITY:
+            points.infinity[:] = True
+        else:
+            x, y = points.native.raw_infinity()[:2]
+            points.x[:], points.y[:] = int(x), int(y)
+        return points
+
+    def _with(self, x, y, infinity=None):
+        if infinity is None:
+            infinity = self.infinity
+        return PointArray(self.curve, x, y, infinity)
+
+    def _vectors(self, x=None, y=None):
+        x = self.x if x is None else x
+        y = self.y if y is None else y
+        return VectorElement(self.p, x), VectorElement(self.p, y)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index: int):
+        if self.infinity[index]:
+            return self.curve.infinity()
+        field = self.curve.field
+        x, y = field(int(self.x[index])), field(int(self.y[index]))
+        return self.curve.from_raw(self.curve.raw_affine(x, y))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_points(self):
+        return list(self)
+
+    def select(self, mask, other):
+        return self._with(
+            numpy.where(mask, other.x, self.x),
+            numpy.where(mask, other.y, self.y),
+            numpy.where(mask, other.infinity, self.infinity),
+        )
+
+    def __add__(self, other):
+        if other.curve is not self.curve:
+            raise ValueError("Points lie on different curves")
+        addition, _ = FORMULAS[self.curve._form]
+        if self.curve._form not in WITH_INFINITY:
+            x, y = addition(self.params, self._vectors(), other._vectors())
+            return self._with(x.values, y.values)
+        same_x = self.x == other.x
+        double = same_x & (self.y == other.y) & (self.y != 0)
+        x2 = numpy.where(same_x, (self.x + 1) % self.p, other.x)
+        x, y = addition(self.params, self._vectors(), other._vectors(x=x2))
+        result = self._with(x.values, y.values, same_x)
+        if double.any():
+            result = result.select(double, self.double())
+        result = result.select(self.infinity, other)
+        return result.select(other.infinity, self)
+
+    def double(self):
+        _, doubling = FORMULAS[self.curve._form]
+        if self.curve._form not in WITH_INFINITY:
+            x, y = doubling(self.params, self._vectors())
+            return self._with(x.values, y.values)
+        order_two = self.y == 0
+        y1 = numpy.where(order_two, 1, self.y)
+        x, y = doubling(self.params, self._vectors(y=y1))
+        return self._with(x.values, y.values, self.infinity | order_two)
+
+    def __neg__(self):
+        x, y, _ = self.native.raw_negate((*self._vectors(), 1))
+        return self._with(x.values, y.values)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rmul__(self, scalar):
+        if isinstance(scalar, (int, numpy.integer)):
+            scalar = int(scalar)
+            if scalar < 0:
+                return (-scalar) * (-self)
+            result = PointArray.identity(self.curve, len(self))
+            for i in reversed(range(scalar.bit_length())):
+                result = result.double()
+                if (scalar >> i) & 1:
+                    result = result + self
+            return result
+        scalars = [int(k) for k in scalar]
+        if len(scalars) != len(self):
+            raise ValueError("Expected one scalar per point")
+        base = self.select(numpy.array([k < 0 for k in scalars]), -self)
+        magnitudes = [abs(k) for k in scalars]
+        bits = max(magnitudes, default=0).bit_length()
+        mask = (1 << LIMB) - 1
+        width = -(-bits // LIMB)
+        limbs = numpy.array(
+            [[(k >> (LIMB * j)) & mask for j in range(width)] for k in magnitudes],
+            dtype=numpy.int64,
+        ).reshape(len(scalars), width)
+        result = PointArray.identity(self.curve, len(self))
+        for i in reversed(range(bits)):
+            result = result.double()
+            bit = (limbs[:, i // LIMB] >> (i % LIMB)) & 1
+            result = result.select(bit == 1, result + base)
+        return result
+
+    def map(self, equivalence):
+        if equivalence.domain is not self.curve:
+            raise ValueError("Points do not lie on the domain of the map")
+        native = _native_equivalence(equivalence)
+        finite = ~self.infinity
+        x, y = self._vectors(
+            numpy.where(finite, self.x, 0), numpy.where(finite, self.y, 0)
+        )
+        images = native.raw_map(x, y)
+        numerators = [self._lanes(q.num) for q in images]
+        denominators = [self._lanes(q.den) for q in images]
+        undefined = self.infinity | (denominators[0] == 0) | (denominators[1] == 0)
+        product = denominators[0] * denominators[1] % self.p
+        inverse = batch_inverse(numpy.where(undefined, 1, product), self.p)
+        u = numerators[0] * denominators[1] % self.p * inverse % self.p
+        v = numerators[1] * denominators[0] % self.p * inverse % self.p
+        result = PointArray(equivalence.codomain, u, v)
+        identity = PointArray.identity(equivalence.codomain, len(self))
+        result = result.select(self.infinity, identity)
+        for index in numpy.flatnonzero(undefined & finite):
+            image = equivalence(self[index])
+            result.x[index], result.y[index] = int(image.x), int(image.y)
+        return result
+
+    def _lanes(self, value):
+        if isinstance(value, VectorElement):
+            return value.values
+        return numpy.full(len(self), int(value) % self.p, dtype=numpy.int64)
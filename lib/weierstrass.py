@@ -1,36 +1,82 @@
-from utils import GF
-from point import Point, Curve
+from utils import GF, roots, square_root
+from point import NoPoint, Point, Curve
 
 
 class Weierstrass(Curve):
-    def __init__(self, a: GF, b: GF):
+    coordinate_systems = ("affine", "jacobian", "projective")
+
+    def __init__(self, a: GF, b: GF, coordinates="affine"):
         self.a = a
         self.b = b
         self.field = a.parent()
         self._form = "shortw"
         self.params = (a, b)
+        self._set_coordinates(coordinates)
 
-    def addition(self, point1, point2):
-        if point1.is_infinity():
+    def raw_add(self, point1, point2):
+        if self.coordinates == "projective":
+            point = shortw_complete_sum(self.params, point1, point2)
+            if point[1] == 0 and point[2] == 0:
+                return self._exceptional_sum(point1, point2)
+            return point
+        if self.is_infinity(*point1):
             return point2
-        if point2.is_infinity():
+        if self.is_infinity(*point2):
             return point1
+        if self.coordinates == "jacobian":
+            return shortw_jacobian_sum(self.params, point1, point2)
         try:
             if point1 == point2:
-                spoint = shortw_dbl((self.a, self.b), (point1.x, point1.y))
+                spoint = shortw_dbl((self.a, self.b), point1[:2])
+            else:
+                spoint = shortw_sum((self.a, self.b), point1[:2], point2[:2])
+        except ZeroDivisionError:
+            return self.raw_infinity()
+        return spoint[0], spoint[1], 1
+
+    def raw_double(self, point):
+        if self.coordinates == "projective":
+            point2 = shortw_complete_dbl(self.params, point)
+            if point2[1] == 0 and point2[2] == 0:
+                return self._exceptional_sum(point, point)
+            return point2
+        if self.is_infinity(*point):
+            return point
+        if self.coordinates == "jacobian":
+            return shortw_jacobian_dbl(self.params, point)
+        try:
+            spoint = shortw_dbl((self.a, self.b), point[:2])
+        except ZeroDivisionError:
+            return self.raw_infinity()
+        return spoint[0], spoint[1], 1
+
+    def _exceptional_sum(self, point1, point2):
+        if point1[2] == 0:
+            return point2
+        if point2[2] == 0:
+            return point1
+        x1, y1 = self.affine_coordinates(*point1[:2], self.field(1) / point1[2])
+        x2, y2 = self.affine_coordinates(*point2[:2], self.field(1) / point2[2])
+        try:
+            if (x1, y1) == (x2, y2):
+                spoint = shortw_dbl(self.params, (x1, y1))
             else:
-                spoint = shortw_sum(
-                    (self.a, self.b), (point1.x, point1.y), (point2.x, point2.y)
-                )
+                spoint = shortw_sum(self.params, (x1, y1), (x2, y2))
         except ZeroDivisionError:
-            return self.infinity()
-        return Point(self, spoint[0], spoint[1])
+            return self.raw_infinity()
+        return spoint[0], spoint[1], self.field(1)
+
+    def raw_negate(self, point):
+        x, y, z = point
+        return x, -y, z
 
     def is_infinity(self, x, y, z):
         return z == 0
 
-    def infinity(self):
-        return Point(self, self.field(0), self.field(1), self.field(0))
+    def raw_infinity(self):
+        if self.coordinates == "jacobian":
+            return self.field(1), self.field(1), self.field(0)
+        return self.field(0), self.field(1), self.field(0)
 
     def form(self):
         return "Weierstrass"
@@ -40,12 +86,56 @@ class Weierstrass(Curve):
             f"Weierstrass curve y^2=x^3+{self.a}x+{self.b} over F_{self.field.order()}"
         )
 
-    def negative(self, point):
-        return Point(self, point.x, -point.y, point.z)
-
     def check_point(self, x, y, z=1):
+        if self.coordinates == "jacobian":
+            z2 = z**2
+            return y**2 == x**3 + (self.a * x + self.b * z2) * z2**2
+        if y == 0 and z == 0:
+            return False
         return y**2 * z == x**3 + self.a * x * z**2 + self.b * z**3
 
+    def enumerate_range(self, start, stop, root):
+        p = int(self.field.order())
+        a, b = int(self.a), int(self.b)
+        for x in range(start, stop):
+            y = root((x * x * x + a * x + b) % p)
+            if y is not None:
+                yield x, y
+                if y:
+                    yield x, p - y
+
+    def has_complete_addition(self):
+        return self.coordinates == "projective" and not roots(
+            self.field, [self.b, self.a, 0, 1]
+        )
+
+    def lift_x(self, x, parity=None):
+        y = square_root(x**3 + self.a * x + self.b, parity)
+        if y is None:
+            raise NoPoint("No such point")
+        return Point.trusted(self, x, y)
+
+    def affine_coordinates(self, x, y, z_inverse):
+        if self.coordinates == "jacobian":
+            z2_inverse = z_inverse**2
+            return x * z2_inverse, y * z2_inverse * z_inverse
+        return x * z_inverse, y * z_inverse
+
+    def raw_equal(self, point1: tuple, point2: tuple):
+        if self.coordinates != "jacobian":
+            return super().raw_equal(point1, point2)
+        x1, y1, z1 = point1
+        x2, y2, z2 = point2
+        if z1 == 0 or z2 == 0:
+            return z1 == 0 and z2 == 0
+        z1z1, z2z2 = z1**2, z2**2
+        return x1 * z2z2 == x2 * z1z1 and y1 * z2z2 * z2 == y2 * z1z1 * z1
+
+    def raw_normal_form(self, point: tuple):
+        if self.coordinates == "jacobian" and point[2] == 0:
+            return 1, 1, 0
+        return super().raw_normal_form(point)
+
 
 def shortw_sum(shortw: tuple, point1: tuple, point2: tuple):
     a, b = shortw
@@ -64,3 +154,85 @@ def shortw_dbl(shortw: tuple, point: tuple):
     x3 = s**2 - 2 * x
     y3 = -y + s * (x - x3)
     return x3, y3
+
+
+def shortw_jacobian_sum(shortw: tuple, point1: tuple, point2: tuple):
+    x1, y1, z1 = point1
+    x2, y2, z2 = point2
+    z1z1 = z1**2
+    z2z2 = z2**2
+    u1 = x1 * z2z2
+    u2 = x2 * z1z1
+    s1 = y1 * z2 * z2z2
+    s2 = y2 * z1 * z1z1
+    h = u2 - u1
+    r = 2 * (s2 - s1)
+    if h == 0 and r == 0:
+        return shortw_jacobian_dbl(shortw, point1)
+    i = (2 * h) ** 2
+    j = h * i
+    v = u1 * i
+    x3 = r**2 - j - 2 * v
+    y3 = r * (v - x3) - 2 * s1 * j
+    z3 = ((z1 + z2) ** 2 - z1z1 - z2z2) * h
+    return x3, y3, z3
+
+
+def shortw_jacobian_dbl(shortw: tuple, point: tuple):
+    a, b = shortw
+    x1, y1, z1 = point
+    xx = x1**2
+    yy = y1**2
+    yyyy = yy**2
+    zz = z1**2
+    s = 2 * ((x1 + yy) ** 2 - xx - yyyy)
+    m = 3 * xx + a * zz**2
+    x3 = m**2 - 2 * s
+    y3 = m * (s - x3) - 8 * yyyy
+    z3 = (y1 + z1) ** 2 - yy - zz
+    return x3, y3, z3
+
+
+def shortw_complete_sum(shortw: tuple, point1: tuple, point2: tuple):
+    a, b = shortw
+    b3 = 3 * b
+    x1, y1, z1 = point1
+    x2, y2, z2 = point2
+    xx = x1 * x2
+    yy = y1 * y2
+    zz = z1 * z2
+    xy = (x1 + y1) * (x2 + y2) - xx - yy
+    xz = (x1 + z1) * (x2 + z2) - xx - zz
+    yz = (y1 + z1) * (y2 + z2) - yy - zz
+    z3 = a * xz + b3 * zz
+    x3 = yy - z3
+    z3 = yy + z3
+    y3 = x3 * z3
+    t1 = 3 * xx + a * zz
+    t2 = b3 * xz + a * (xx - a * zz)
+    y3 = y3 + t1 * t2
+    x3 = xy * x3 - yz * t2
+    z3 = yz * z3 + xy * t1
+    return x3, y3, z3
+
+
+def shortw_complete_dbl(shortw: tuple, point: tuple):
+    a, b = shortw
+    b3 = 3 * b
+    x1, y1, z1 = point
+    xx = x1**2
+    yy = y1**2
+    zz = z1**2
+    xy = 2 * x1 * y1
+    xz = 2 * x1 * z1
+    x3 = yy - (a * xz + b3 * zz)
+    y3 = yy + (a * xz + b3 * zz)
+    y3 = x3 * y3
+    x3 = xy * x3
+    t3 = a * (xx - a * zz) + b3 * xz
+    t0 = (3 * xx + a * zz) * t3
+    y3 = y3 + t0
+    yz = 2 * y1 * z1
+    x3 = x3 - yz * t3
+    z3 = 4 * yz * yy
+    return x3, y3, z3